@@ -0,0 +1,191 @@
+import math
+import random
+import time
+from typing import Any, Callable, Mapping
+
+from alg.dijkstra import dijkstra, reconstruct_path
+from ds.frozen_graph import FrozenGraph
+from ds.graph import Graph
+from ds.heap import IndexedMinHeap
+
+
+def astar(graph: Graph | FrozenGraph, source, target, heuristic: Callable[[Any, Any], int|float],
+          heap: type = IndexedMinHeap, debug: bool = False) -> (int|float, list, dict[str, int]):
+    """
+    A* search for the shortest path between two vertices, guided by a heuristic estimate of the remaining distance.
+
+    This is `shortest_path()` with every vertex queued by its distance from `source` plus its estimated distance to
+    `target`, so the search heads towards `target` rather than spreading out evenly in every direction. The path found
+    is a shortest path as long as the heuristic never overestimates (it is admissible). If it is also consistent
+    (`heuristic(u, target) <= w + heuristic(v, target)` for every edge `(u, v, w)`), no vertex is expanded twice;
+    otherwise a vertex whose distance improves after it was expanded is queued again.
+
+    Time complexity: O(E log V) in the worst case, where E is the number of edges in the graph and V is the number of
+    vertices. With a good heuristic, far fewer vertices than Dijkstra's Algorithm are expanded.
+    Space complexity: O(V') where V' is the number of vertices reached.
+
+    :param heuristic: A function `heuristic(vertex, target)` estimating the distance from `vertex` to `target`, e.g.
+        one made by `euclidean()`, `manhattan()` or `haversine()`. It is called once per vertex reached.
+    :param heap: The priority queue type to use, as for `dijkstra()`.
+    :param debug: Whether to check that the heuristic is consistent on every edge relaxed.
+    :return: The distance from `source` to `target`, the vertices on the shortest path between them (or `(inf, [])` if
+        `target` is not reachable), and a dict of search statistics: the number of vertices `expanded`, `pushed` onto
+        the queue and `reopened` (expanded again after their distance improved)
+    :raises ValueError: If `debug` is set and the heuristic is found to be inconsistent.
+    """
+    for v in (source, target):
+        if v not in graph:
+            raise KeyError(f'Value \'{v}\' not present in graph.')
+
+    distances = {source: 0}
+    predecessors = {source: None}
+    estimates = {source: heuristic(source, target)}
+    expanded = set()
+    stats = {'expanded': 0, 'pushed': 1, 'reopened': 0}
+    if debug and heuristic(target, target) != 0:
+        raise ValueError(f'Heuristic estimates a distance of {heuristic(target, target)} from the target to itself.')
+    queue = heap()
+    queue.push(source, estimates[source])
+
+    while not queue.is_empty():
+        u = queue.pop()
+        stats['expanded'] += 1
+        if u in expanded:
+            stats['reopened'] += 1
+        expanded.add(u)
+        if u == target:
+            return distances[u], reconstruct_path(predecessors, source, target), stats
+
+        for v, w in graph.neighbors(u):
+            if v not in estimates:
+                estimates[v] = heuristic(v, target)
+            # Allow for floating point rounding in geometric heuristics
+            if debug and estimates[u] > w + estimates[v] and not math.isclose(estimates[u], w + estimates[v]):
+                raise ValueError(f'Heuristic is not consistent on edge ({u}, {v}, {w}): it estimates {estimates[u]} '
+                                 f'from {u} but {w} + {estimates[v]} through {v}.')
+            alt = distances[u] + w
+            if v in distances and alt >= distances[v]:
+                continue
+            distances[v] = alt
+            predecessors[v] = u
+            if v in queue:
+                queue.update_value(v, alt + estimates[v])
+            else:
+                queue.push(v, alt + estimates[v])
+                stats['pushed'] += 1
+
+    return float('inf'), [], stats
+
+
+def _position_of(positions: Mapping | Callable | None) -> Callable:
+    if positions is None:
+        return lambda vertex: vertex
+    if isinstance(positions, Mapping):
+        return positions.__getitem__
+    return positions
+
+
+def euclidean(positions: Mapping | Callable = None, scale: float = 1) -> Callable[[Any, Any], float]:
+    """
+    Make a heuristic estimating the straight line distance between two vertices.
+    :param positions: A mapping or function from each vertex to its coordinates. Defaults to the vertices themselves
+        being coordinates, such as `(x, y)` tuples.
+    :param scale: The lowest edge weight per unit of distance, so that the estimate never exceeds the true distance.
+    """
+    position = _position_of(positions)
+    return lambda u, v: scale * math.dist(position(u), position(v))
+
+
+def manhattan(positions: Mapping | Callable = None, scale: float = 1) -> Callable[[Any, Any], float]:
+    """
+    Make a heuristic estimating the distance between two vertices as the sum of their differences along each axis,
+    which is admissible on grids with no diagonal edges.
+    :param positions: A mapping or function from each vertex to its coordinates. Defaults to the vertices themselves
+        being coordinates, such as `(x, y)` tuples.
+    :param scale: The lowest edge weight per unit of distance, so that the estimate never exceeds the true distance.
+    """
+    position = _position_of(positions)
+    return lambda u, v: scale * sum(abs(a - b) for a, b in zip(position(u), position(v)))
+
+
+def haversine(positions: Mapping | Callable = None, radius: float = 6371.0088) -> Callable[[Any, Any], float]:
+    """
+    Make a heuristic estimating the great circle distance between two vertices on the surface of a sphere.
+    :param positions: A mapping or function from each vertex to its `(latitude, longitude)` in degrees. Defaults to
+        the vertices themselves being `(latitude, longitude)` tuples.
+    :param radius: The radius of the sphere, in the units of the edge weights. Defaults to the mean radius of the
+        Earth in kilometers.
+    """
+    position = _position_of(positions)
+
+    def estimate(u, v) -> float:
+        (lat1, lon1), (lat2, lon2) = position(u), position(v)
+        lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * radius * math.asin(min(1.0, math.sqrt(a)))
+
+    return estimate
+
+
+if __name__ == '__main__':
+    graph = Graph[tuple[int, int]]()
+    for x in range(4):
+        for y in range(4):
+            graph.add_vertex((x, y))
+    for x in range(4):
+        for y in range(4):
+            if x < 3:
+                graph.add_edge((x, y), (x + 1, y), 1)
+            if y < 3:
+                graph.add_edge((x, y), (x, y + 1), 1)
+    graph.remove_vertex((1, 1))
+    graph.remove_vertex((2, 1))
+    print('A* from (0, 0) to (3, 3): ', astar(graph, (0, 0), (3, 3), manhattan(), debug=True))
+    try:
+        astar(graph, (0, 0), (3, 3), manhattan(scale=5), debug=True)
+    except ValueError as e:
+        print('Caught ValueError: ', e)
+
+    print()
+
+    size = 300
+    queries = 10
+    print(f'Benchmark: {queries} queries on a {size}x{size} grid with weights between 1 and 10')
+    grid = Graph[tuple[int, int]](capacity=size * size)
+    grid.add_vertices((x, y) for x in range(size) for y in range(size))
+    grid.add_edges([((x, y), (x + 1, y), random.randint(1, 10)) for x in range(size - 1) for y in range(size)] +
+                   [((x, y), (x, y + 1), random.randint(1, 10)) for x in range(size) for y in range(size - 1)])
+    pairs = [((random.randrange(size), random.randrange(size)), (random.randrange(size), random.randrange(size)))
+             for _ in range(queries)]
+
+    start = time.perf_counter()
+    for source, target in pairs[:2]:
+        dijkstra(grid, source)
+    print(f'  dijkstra():            {len(grid.nodes())} vertices expanded, '
+          f'{(time.perf_counter() - start) / 2 * 1000:.0f}ms/query')
+    for name, heuristic in (('no heuristic', lambda u, v: 0), ('euclidean()', euclidean()),
+                            ('manhattan()', manhattan())):
+        start = time.perf_counter()
+        expanded = 0
+        for source, target in pairs:
+            expanded += astar(grid, source, target, heuristic)[2]['expanded']
+        print(f'  astar(), {name + ":":<13} {expanded // queries} vertices expanded, '
+              f'{(time.perf_counter() - start) / queries * 1000:.0f}ms/query')
+
+    # A lattice over a stretch of the globe, with roads 0-50% longer than the great circle between their ends
+    rows, columns = 200, 200
+    print(f'Benchmark: {queries} queries on a {rows}x{columns} latitude/longitude lattice')
+    points = {(i, j): (40 + i * 0.01, -5 + j * 0.01) for i in range(rows) for j in range(columns)}
+    distance = haversine(points)
+    geo = Graph[tuple[int, int]](capacity=rows * columns)
+    geo.add_vertices(points)
+    geo.add_edges([(u, v, distance(u, v) * random.uniform(1, 1.5)) for u in points
+                   for v in ((u[0] + 1, u[1]), (u[0], u[1] + 1)) if v in points])
+    pairs = [(random.choice(list(points)), random.choice(list(points))) for _ in range(queries)]
+    for name, heuristic in (('no heuristic', lambda u, v: 0), ('haversine()', distance)):
+        start = time.perf_counter()
+        expanded = 0
+        for source, target in pairs:
+            expanded += astar(geo, source, target, heuristic)[2]['expanded']
+        print(f'  astar(), {name + ":":<13} {expanded // queries} vertices expanded, '
+              f'{(time.perf_counter() - start) / queries * 1000:.0f}ms/query')
@@ -1,15 +1,36 @@
-from typing import Any
+import random
+import time
+from collections import deque
+from typing import Any, Iterable
 
+from ds.frozen_graph import FrozenGraph
 from ds.graph import Graph
 
 
-def bellman_ford(graph: Graph, start) -> (dict[Any, int], dict[Any, Any]):
+class NegativeCycleError(ValueError):
+    """
+    Raised when a negative cycle is reachable from the start vertex, so that some distances have no minimum.
+    """
+    def __init__(self, cycle: list):
+        """
+        :param cycle: The vertices on the cycle, in the order of its edges, starting and ending with the same vertex.
+        """
+        super().__init__(f'Graph contains a negative cycle: {cycle}')
+        self.cycle = cycle
+
+
+def bellman_ford(graph: Graph | FrozenGraph, start) -> (dict[Any, int], dict[Any, Any]):
     """
     Bellman-Ford Algorithm used to find the shortest path between two nodes
     in a weighted graph where there may be negative weights.
 
     Time complexity: O(E * V) where E is the number of edges in the graph and V is the number of vertices.
     Space complexity: O(V)
+
+    The edge list is fetched once up front and reused by every pass. Passes stop as soon as one changes no distance,
+    since every later pass would see the same distances, so a graph whose shortest paths have at most k edges takes
+    k + 1 passes rather than V - 1. Undirected edges are relaxed in both directions.
+    :raises NegativeCycleError: If a negative cycle is reachable from `start`.
     """
     if start not in graph:
         raise KeyError(f'Value \'{start}\' not present in graph.')
@@ -21,21 +42,119 @@ def bellman_ford(graph: Graph, start) -> (dict[Any, int], dict[Any, Any]):
             distances[v] = float('inf')
             predecessors[v] = None
 
-    for _ in range(len(graph.nodes()) - 1):
-        for u, v, w in graph.edges():
+    edges = graph.edges()
+    if not graph.directed:
+        edges += [(v, u, w) for u, v, w in edges]
+    for _ in range(len(distances) - 1):
+        changed = False
+        for u, v, w in edges:
             alt = distances[u] + w
             if alt < distances[v]:
                 distances[v] = alt
                 predecessors[v] = u
+                changed = True
+        if not changed:
+            return distances, predecessors
 
-    for u, v, w in graph.edges():
+    for u, v, w in edges:
         alt = distances[u] + w
         if alt < distances[v]:
-            raise ValueError('Graph contains a negative cycle')
+            # Lowering a distance after V - 1 passes closes a cycle in the predecessor graph
+            predecessors[v] = u
+            raise NegativeCycleError(_predecessor_cycle(predecessors))
 
     return distances, predecessors
 
 
+def spfa(graph: Graph | FrozenGraph, start) -> (dict[Any, int], dict[Any, Any]):
+    """
+    The queue-based Bellman-Ford Algorithm (the Shortest Path Faster Algorithm), for graphs with negative weights.
+
+    Rather than relaxing every edge on every pass, only the edges out of vertices whose distance dropped are relaxed
+    again, by keeping those vertices in a FIFO queue (each at most once at a time). Processing the queue in order does
+    the same relaxations as the passes of `bellman_ford()`, minus the ones that could not change anything.
+
+    A negative cycle would keep the queue from ever emptying. Instead of counting how often each vertex is queued,
+    which only notices a cycle after V rounds, the predecessor graph is checked for a cycle after every V relaxations.
+    Any cycle of predecessors is a negative cycle, and one forms soon after the search first goes around a negative
+    cycle, while the checks add O(1) amortized time per relaxation.
+
+    Time complexity: O(E * V) in the worst case, like `bellman_ford()`, but close to O(E * k) in practice when shortest
+    paths have at most k edges.
+    Space complexity: O(V)
+    :raises NegativeCycleError: If a negative cycle is reachable from `start`.
+    """
+    if start not in graph:
+        raise KeyError(f'Value \'{start}\' not present in graph.')
+    return _spfa(graph, [start])
+
+
+def find_negative_cycle(graph: Graph | FrozenGraph) -> list | None:
+    """
+    Find a negative cycle anywhere in the graph, not only one reachable from a given vertex.
+
+    This runs `spfa()` from every vertex at once, with every distance starting at 0, as if an extra vertex had an edge
+    of weight 0 to every vertex.
+    :return: The vertices on a negative cycle, in the order of its edges, starting and ending with the same vertex, or
+        `None` if the graph has no negative cycle
+    """
+    try:
+        _spfa(graph, graph.nodes())
+    except NegativeCycleError as e:
+        return e.cycle
+    return None
+
+
+def _spfa(graph: Graph | FrozenGraph, sources: Iterable) -> (dict[Any, int], dict[Any, Any]):
+    distances = {v: float('inf') for v in graph.nodes()}
+    predecessors = {v: None for v in distances}
+    queue = deque(sources)
+    queued = set(queue)
+    for v in queue:
+        distances[v] = 0
+
+    relaxations = 0
+    while queue:
+        u = queue.popleft()
+        queued.discard(u)
+        for v, w in graph.neighbors(u):
+            alt = distances[u] + w
+            if alt < distances[v]:
+                distances[v] = alt
+                predecessors[v] = u
+                relaxations += 1
+                if relaxations % len(distances) == 0:
+                    cycle = _predecessor_cycle(predecessors)
+                    if cycle is not None:
+                        raise NegativeCycleError(cycle)
+                if v not in queued:
+                    queue.append(v)
+                    queued.add(v)
+
+    return distances, predecessors
+
+
+def _predecessor_cycle(predecessors: dict[Any, Any]) -> list | None:
+    """
+    Find a cycle in the graph of predecessor links, in O(V) time, by walking back from each vertex until the walk
+    reaches the start, a vertex seen on an earlier walk, or a vertex seen on this walk (closing a cycle).
+    :return: The vertices on the cycle, in the order of its edges, starting and ending with the same vertex, or `None`
+    """
+    walk_of = {}
+    for walk, v in enumerate(predecessors):
+        path = []
+        while v is not None and v not in walk_of:
+            walk_of[v] = walk
+            path.append(v)
+            v = predecessors[v]
+        if v is not None and walk_of[v] == walk:
+            # The path follows predecessor links, which point against the edges
+            cycle = path[path.index(v):] + [v]
+            cycle.reverse()
+            return cycle
+    return None
+
+
 if __name__ == '__main__':
     graph = Graph[str](directed= True)
     graph.add_vertex('A')
@@ -54,4 +173,45 @@ if __name__ == '__main__':
 
     dist, pred = bellman_ford(graph, 'A')
     print('Distances from A: ', dist)
-    print('Predecessors: ', pred)
\ No newline at end of file
+    print('Predecessors: ', pred)
+    print('spfa(): ', spfa(graph, 'A'))
+    graph.add_edge('C', 'A', -5)
+    try:
+        bellman_ford(graph, 'A')
+    except NegativeCycleError as e:
+        print('Caught NegativeCycleError, cycle: ', e.cycle)
+    print('find_negative_cycle(): ', find_negative_cycle(graph))
+
+    print()
+
+    def benchmark(name: str, graph: Graph):
+        print(f'Benchmark: {name} with {len(graph.nodes())} vertices and {graph.edge_count} edges')
+        # Time a single pass over the edges, to estimate the cost of always running V - 1 of them
+        edges = graph.edges()
+        distances = dict.fromkeys(graph.nodes(), 0)
+        start = time.perf_counter()
+        for u, v, w in edges:
+            if distances[u] + w < distances[v]:
+                pass
+        full = (time.perf_counter() - start) * (len(distances) - 1)
+        print(f'  V - 1 passes (estimated): {full:.2f}s')
+        for search in (bellman_ford, spfa):
+            start = time.perf_counter()
+            search(graph, 0)
+            print(f'  {search.__name__ + "():":<25} {time.perf_counter() - start:.2f}s')
+
+    n = 20_000
+    m = 100_000
+    random_graph = Graph[int](directed=True, capacity=n)
+    random_graph.add_vertices(range(n))
+    random_graph.add_edges((random.randrange(n), random.randrange(n), random.randint(1, 100)) for _ in range(m))
+    benchmark('random graph, positive weights', random_graph)
+
+    # Edges only go right and down, so there are no cycles, negative or otherwise. The vertices are added in a random
+    # order, since edges are listed by vertex and in row order a single pass of bellman_ford() would settle the grid
+    size = 100
+    grid = Graph[int](directed=True, capacity=size * size)
+    grid.add_vertices(random.sample(range(size * size), size * size))
+    grid.add_edges([(v, v + 1, random.randint(-5, 10)) for v in range(size * size) if v % size < size - 1] +
+                   [(v, v + size, random.randint(-5, 10)) for v in range(size * size - size)])
+    benchmark(f'{size}x{size} grid, weights between -5 and 10', grid)
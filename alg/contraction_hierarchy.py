@@ -0,0 +1,393 @@
+import os
+import random
+import struct
+import tempfile
+import time
+from array import array
+
+from alg.dijkstra import bidirectional_shortest_path, shortest_path
+from ds.binary_io import read_array, read_vertices, vertex_kind, write_array, write_vertices
+from ds.frozen_graph import FrozenGraph
+from ds.graph import Graph
+from ds.heap import IndexedMinHeap
+
+
+class ContractionHierarchy[T]:
+    """
+    A contraction hierarchy over a static graph with non-negative weights, answering shortest path queries between
+    pairs of vertices far faster than Dijkstra's Algorithm after a one-off preprocessing step.
+
+    Preprocessing (`build()`) ranks the vertices by importance and contracts them from least to most important. A
+    contracted vertex is removed from the remaining graph, and whenever the only shortest path between two of its
+    neighbors went through it, a shortcut edge between them is added in its place. A bounded local Dijkstra search (the
+    witness search) checks whether some other path is just as short, in which case no shortcut is needed. The next
+    vertex to contract is the one with the lowest edge difference (shortcuts added minus edges removed) plus number of
+    already contracted neighbors, which is recomputed lazily when the vertex reaches the front of the queue.
+
+    Every shortest path then has a version that only goes up in rank and then down again, so a query runs a
+    bidirectional Dijkstra search in which both sides only ever move to higher ranked vertices. Each side explores a
+    tiny part of the graph, and the shortcuts on the path found are unpacked into the original edges through the
+    vertex each one was added for.
+
+    The upward edges are kept in compressed sparse row arrays, as in `FrozenGraph`, and `save()` writes them to a
+    binary file that `load()` reads back without redoing the preprocessing.
+
+    Time Complexities:
+        - Build: no useful bound in general; about `O(v log v)` witness searches of bounded size on road-like graphs
+        - Query: roughly `O(e' log v')` where `v'` and `e'` are the few vertices and edges above the source and target
+    """
+    _MAGIC = b'DSACHRC1'
+    _HEADER = struct.Struct('<8sBBxxxxxxQQQ')
+    _INT_WEIGHTS = 0
+    _FLOAT_WEIGHTS = 1
+
+    def __init__(self, vertices: [T], rank: array, forward: tuple, backward: tuple):
+        """
+        Use `build()` or `load()` to create a hierarchy.
+        :param vertices: The vertices, in the order of their ids.
+        :param rank: The position of each vertex id in the contraction order.
+        :param forward: The `(offsets, targets, weights, middles)` arrays of the upward edges out of each vertex.
+        :param backward: The same arrays for the upward edges into each vertex, followed in reverse.
+        """
+        self.vertices = vertices
+        self._ids = {vertex: i for i, vertex in enumerate(vertices)}
+        self._rank = rank
+        self._forward = forward
+        self._backward = backward
+
+    def __contains__(self, item):
+        return item in self._ids
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def edge_count(self) -> int:
+        """
+        The number of directed edges in the hierarchy, shortcuts included. Undirected edges count once per direction.
+        """
+        return len(self._forward[1]) + len(self._backward[1])
+
+    @classmethod
+    def build(cls, graph: Graph | FrozenGraph, witness_settle_limit: int = 64) -> 'ContractionHierarchy':
+        """
+        Preprocess `graph` into a contraction hierarchy. Later changes to `graph` are not reflected in the hierarchy.
+        :param witness_settle_limit: The most vertices a witness search settles before giving up and adding the
+            shortcut anyway. Lower limits build faster but add more (unnecessary) shortcuts, slowing queries down.
+        :raises ValueError: If an edge has a negative or missing weight.
+        """
+        vertices = graph.nodes()
+        ids = {vertex: i for i, vertex in enumerate(vertices)}
+        n = len(vertices)
+        out_edges = [dict() for _ in range(n)]
+        in_edges = [dict() for _ in range(n)]
+        # The vertex each shortcut `(u, x)` skips over
+        middles = {}
+        for u, v, w in graph.edges():
+            if w is None or w < 0:
+                raise ValueError(f'Contraction hierarchies need non-negative weights, but edge ({u}, {v}) has {w}.')
+            a, b = ids[u], ids[v]
+            for start, end in ((a, b),) if graph.directed else ((a, b), (b, a)):
+                if w < out_edges[start].get(end, float('inf')):
+                    out_edges[start][end] = w
+                    in_edges[end][start] = w
+
+        contracted_neighbors = [0] * n
+        priorities = [0] * n
+        queue = IndexedMinHeap()
+        for v in range(n):
+            priorities[v] = cls._priority(v, out_edges, in_edges, contracted_neighbors,
+                                          cls._shortcuts(v, out_edges, in_edges, witness_settle_limit))
+            queue.push(v, priorities[v])
+
+        rank = array('q', [0] * n)
+        forward = [None] * n
+        backward = [None] * n
+        for order in range(n):
+            while True:
+                v = queue.pop()
+                shortcuts = cls._shortcuts(v, out_edges, in_edges, witness_settle_limit)
+                priorities[v] = cls._priority(v, out_edges, in_edges, contracted_neighbors, shortcuts)
+                if queue.is_empty() or priorities[v] <= priorities[queue.peek()]:
+                    break
+                queue.push(v, priorities[v])
+
+            rank[v] = order
+            # Every neighbor still in the graph will be contracted later, so all of v's edges lead upwards
+            forward[v] = [(x, w, middles.get((v, x), -1)) for x, w in out_edges[v].items()]
+            backward[v] = [(u, w, middles.get((u, v), -1)) for u, w in in_edges[v].items()]
+            for u in in_edges[v]:
+                del out_edges[u][v]
+                contracted_neighbors[u] += 1
+            for x in out_edges[v]:
+                del in_edges[x][v]
+                contracted_neighbors[x] += 1
+            out_edges[v], in_edges[v] = {}, {}
+            for u, x, w in shortcuts:
+                if w < out_edges[u].get(x, float('inf')):
+                    out_edges[u][x] = w
+                    in_edges[x][u] = w
+                    middles[(u, x)] = v
+
+        return cls(vertices, rank, cls._pack(forward), cls._pack(backward))
+
+    @staticmethod
+    def _shortcuts(v: int, out_edges: list, in_edges: list, settle_limit: int) -> [(int, int, int|float)]:
+        """
+        Find the shortcuts `(u, x, weight)` needed to keep every shortest path `u -> v -> x` if `v` were contracted.
+        """
+        shortcuts = []
+        for u, first_weight in in_edges[v].items():
+            via = {x: first_weight + w for x, w in out_edges[v].items() if x != u}
+            if not via:
+                continue
+            distances = ContractionHierarchy._witness_search(u, v, via, out_edges, settle_limit)
+            shortcuts.extend((u, x, w) for x, w in via.items() if distances.get(x, float('inf')) > w)
+        return shortcuts
+
+    @staticmethod
+    def _witness_search(source: int, excluded: int, via: dict[int, int|float], out_edges: list,
+                        settle_limit: int) -> dict[int, int|float]:
+        """
+        Dijkstra's Algorithm from `source` around `excluded`, looking for paths to each target in `via` that are no
+        longer than the path to it through `excluded`. Stops as soon as every target has one, or past the longest path
+        through `excluded` or `settle_limit` settled vertices. Every distance found is the length of an actual path, so
+        it is safe to rely on even if not minimal.
+        """
+        max_distance = max(via.values())
+        unwitnessed = len(via)
+        distances = {source: 0}
+        queue = IndexedMinHeap()
+        queue.push(source, 0)
+        for _ in range(settle_limit):
+            if queue.is_empty():
+                break
+            u = queue.pop()
+            if distances[u] > max_distance:
+                break
+            for x, w in out_edges[u].items():
+                alt = distances[u] + w
+                if x == excluded or alt > max_distance or alt >= distances.get(x, float('inf')):
+                    continue
+                if x in via and alt <= via[x] < distances.get(x, float('inf')):
+                    unwitnessed -= 1
+                    if unwitnessed == 0:
+                        distances[x] = alt
+                        return distances
+                if x in distances:
+                    distances[x] = alt
+                    if x in queue:
+                        queue.update_value(x, alt)
+                else:
+                    distances[x] = alt
+                    queue.push(x, alt)
+        return distances
+
+    @staticmethod
+    def _priority(v: int, out_edges: list, in_edges: list, contracted_neighbors: list, shortcuts: list) -> int:
+        return len(shortcuts) - len(out_edges[v]) - len(in_edges[v]) + contracted_neighbors[v]
+
+    @staticmethod
+    def _pack(adjacency: list) -> (array, array, array | list, array):
+        offsets = array('q', [0])
+        targets = array('q')
+        weights = []
+        middles = array('q')
+        for edges in adjacency:
+            for target, weight, middle in edges:
+                targets.append(target)
+                weights.append(weight)
+                middles.append(middle)
+            offsets.append(len(targets))
+        weights = array('q' if all(type(w) is int for w in weights) else 'd', weights)
+        return offsets, targets, weights, middles
+
+    def _id(self, value: T) -> int:
+        try:
+            return self._ids[value]
+        except KeyError:
+            raise KeyError(f'Value \'{value}\' not present in graph.') from None
+
+    def _search(self, source: int, target: int) -> (int|float, int | None, dict, dict):
+        """
+        Run the bidirectional upward search.
+        :return: The distance, the vertex where the two sides meet on the shortest path, and each side's predecessors
+        """
+        sides = []
+        for start, (offsets, targets, weights, _) in ((source, self._forward), (target, self._backward)):
+            queue = IndexedMinHeap()
+            queue.push(start, 0)
+            sides.append((queue, {start: 0}, {start: None}, offsets, targets, weights))
+        best, meeting = float('inf'), None
+
+        side = 0
+        while True:
+            # Alternate between the sides, skipping any that can no longer find a shorter path
+            active = [i for i in (side, 1 - side)
+                      if not sides[i][0].is_empty() and sides[i][1][sides[i][0].peek()] < best]
+            if not active:
+                break
+            side = active[0]
+            queue, distances, predecessors, offsets, targets, weights = sides[side]
+            other_distances = sides[1 - side][1]
+            u = queue.pop()
+            if u in other_distances and distances[u] + other_distances[u] < best:
+                best, meeting = distances[u] + other_distances[u], u
+            for pos in range(offsets[u], offsets[u + 1]):
+                v = targets[pos]
+                alt = distances[u] + weights[pos]
+                if v not in distances:
+                    distances[v] = alt
+                    predecessors[v] = u
+                    queue.push(v, alt)
+                elif alt < distances[v]:
+                    distances[v] = alt
+                    predecessors[v] = u
+                    if v in queue:
+                        queue.update_value(v, alt)
+            side = 1 - side
+
+        return best, meeting, sides[0][2], sides[1][2]
+
+    def _middle(self, start: int, end: int) -> int:
+        """
+        Get the vertex the edge from `start` to `end` is a shortcut over, or -1 if it is an edge of the original graph.
+        """
+        if self._rank[start] < self._rank[end]:
+            vertex, other, (offsets, targets, _, middles) = start, end, self._forward
+        else:
+            vertex, other, (offsets, targets, _, middles) = end, start, self._backward
+        for pos in range(offsets[vertex], offsets[vertex + 1]):
+            if targets[pos] == other:
+                return middles[pos]
+        raise KeyError(f'No edge from {start} to {end} in the hierarchy.')
+
+    def _unpack(self, path: [int]) -> [int]:
+        """
+        Replace every shortcut on `path` (a list of vertex ids) by the original edges it stands for.
+        """
+        unpacked = path[:1]
+        for end in path[1:]:
+            # The ends of the parts of the edge still to unpack, the next one last
+            pending = [end]
+            while pending:
+                middle = self._middle(unpacked[-1], pending[-1])
+                if middle < 0:
+                    unpacked.append(pending.pop())
+                else:
+                    pending.append(middle)
+        return unpacked
+
+    def distance(self, source: T, target: T) -> int|float:
+        """
+        Get the length of the shortest path from `source` to `target`, or `inf` if there is none.
+        """
+        return self._search(self._id(source), self._id(target))[0]
+
+    def shortest_path(self, source: T, target: T) -> (int|float, list):
+        """
+        Find the shortest path from `source` to `target`.
+        :return: The distance from `source` to `target` and the vertices on the shortest path between them, or
+            `(inf, [])` if `target` is not reachable from `source`
+        """
+        distance, meeting, predecessors, successors = self._search(self._id(source), self._id(target))
+        if meeting is None:
+            return distance, []
+        path = [meeting]
+        while predecessors[path[-1]] is not None:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+        while successors[path[-1]] is not None:
+            path.append(successors[path[-1]])
+        return distance, [self.vertices[v] for v in self._unpack(path)]
+
+    def save(self, path: str):
+        """
+        Write the hierarchy to `path` in a compact binary format, to be reopened with `load()`.
+        :raises TypeError: If the vertices are not all `int`s or all `str`s.
+        """
+        kind = vertex_kind(self.vertices)
+        weight_kind = self._INT_WEIGHTS if self._forward[2].typecode == 'q' and self._backward[2].typecode == 'q' \
+            else self._FLOAT_WEIGHTS
+        with open(path, 'wb') as file:
+            file.write(self._HEADER.pack(self._MAGIC, kind, weight_kind, len(self.vertices),
+                                         len(self._forward[1]), len(self._backward[1])))
+            write_vertices(file, self.vertices, kind)
+            write_array(file, self._rank)
+            for offsets, targets, weights, middles in (self._forward, self._backward):
+                write_array(file, offsets)
+                write_array(file, targets)
+                write_array(file, weights if weight_kind == self._INT_WEIGHTS else array('d', weights))
+                write_array(file, middles)
+
+    @classmethod
+    def load(cls, path: str) -> 'ContractionHierarchy':
+        """
+        Open a hierarchy written by `save()`.
+        :raises ValueError: If `path` does not contain a hierarchy written by `save()`.
+        """
+        with open(path, 'rb') as file:
+            header = file.read(cls._HEADER.size)
+            if len(header) < cls._HEADER.size or not header.startswith(cls._MAGIC):
+                raise ValueError(f'\'{path}\' is not a ContractionHierarchy file.')
+            _, kind, weight_kind, num_vertices, num_forward, num_backward = cls._HEADER.unpack(header)
+            vertices = read_vertices(file, kind, num_vertices)
+            rank = read_array(file, 'q', num_vertices)
+            directions = []
+            for num_edges in (num_forward, num_backward):
+                directions.append((read_array(file, 'q', num_vertices + 1), read_array(file, 'q', num_edges),
+                                   read_array(file, 'q' if weight_kind == cls._INT_WEIGHTS else 'd', num_edges),
+                                   read_array(file, 'q', num_edges)))
+        return cls(vertices, rank, *directions)
+
+
+if __name__ == '__main__':
+    graph = Graph[str](directed=True)
+    graph.add_edges([('A', 'B', 10), ('A', 'E', 3), ('B', 'C', 2), ('B', 'E', 4), ('C', 'D', 9), ('D', 'C', 7),
+                     ('E', 'D', 2), ('E', 'B', 1), ('E', 'C', 8)], auto_create_vertices=True)
+    hierarchy = ContractionHierarchy.build(graph)
+    print('A to C: ', hierarchy.shortest_path('A', 'C'))
+    print('D to A: ', hierarchy.shortest_path('D', 'A'))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'graph.ch')
+        hierarchy.save(path)
+        print('A to D (reloaded): ', ContractionHierarchy.load(path).shortest_path('A', 'D'))
+
+    print()
+
+    size = 100
+    grid = Graph[int](capacity=size * size)
+    grid.add_vertices(range(size * size))
+    grid.add_edges([(x * size + y, (x + 1) * size + y, random.randint(1, 10)) for x in range(size - 1)
+                    for y in range(size)] +
+                   [(x * size + y, x * size + y + 1, random.randint(1, 10)) for x in range(size)
+                    for y in range(size - 1)])
+    # Random graphs have no hierarchy to speak of: the graph left to contract quickly becomes dense, so keep it small
+    n = 1_000
+    random_graph = Graph[int](capacity=n)
+    random_graph.add_vertices(range(n))
+    random_graph.add_edges((random.randrange(n), random.randrange(n), random.randint(1, 100)) for _ in range(2 * n))
+
+    queries = 200
+    for name, benchmark_graph in ((f'{size}x{size} grid', grid), (f'random graph with {n} vertices', random_graph)):
+        print(f'Benchmark: {name} and {benchmark_graph.edge_count} edges, {queries} queries')
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(benchmark_graph)
+        build_time = time.perf_counter() - start
+        shortcuts = hierarchy.edge_count - 2 * benchmark_graph.edge_count
+        print(f'  build():                       {build_time:.2f}s ({shortcuts} shortcuts)')
+
+        nodes = benchmark_graph.nodes()
+        pairs = [(random.choice(nodes), random.choice(nodes)) for _ in range(queries)]
+        timings = {}
+        for search in (shortest_path, bidirectional_shortest_path, hierarchy.shortest_path):
+            start = time.perf_counter()
+            for source, target in pairs:
+                search(*(() if search == hierarchy.shortest_path else (benchmark_graph,)), source, target)
+            timings[search.__qualname__] = (time.perf_counter() - start) / queries
+            print(f'  {search.__qualname__ + "():":<30} {timings[search.__qualname__] * 1000:.2f}ms/query')
+        saved = timings['bidirectional_shortest_path'] - timings['ContractionHierarchy.shortest_path']
+        if saved > 0:
+            print(f'  build() pays for itself after {build_time / saved:,.0f} queries')
+        else:
+            print('  build() never pays for itself over bidirectional_shortest_path()')
@@ -1,42 +1,466 @@
-from typing import Any
+import concurrent.futures
+import functools
+import os
+import random
+import time
+import weakref
+from typing import Any, Callable, Iterable, Tuple
 
+from ds.bucket_queue import BucketQueue
+from ds.frozen_graph import FrozenGraph
 from ds.graph import Graph
-from ds.heap import MinHeap
+from ds.heap import IndexedMinHeap
+from ds.lru_cache import LRUCache
+from ds.pairing_heap import PairingHeap
+from ds.radix_heap import RadixHeap
 
 
-def dijkstra(graph: Graph, start: str) -> (dict[Any, int], dict[Any, str]):
+# The largest edge weight for which `dijkstra()` picks Dial's bucket queue over a radix heap
+_BUCKET_QUEUE_MAX_WEIGHT = 1024
+
+
+def dijkstra(graph: Graph | FrozenGraph, start: str, heap: Callable = None) -> (dict[Any, int], dict[Any, str]):
     """
     Dijkstra's Algorithm used to find the shortest path between two nodes in a weighted graph.
 
     Time complexity: O(E log V) where E is the number of edges in the graph and V is the number of vertices.
+        - The queue is an indexed heap, so checking whether a vertex is still queued is O(1) and lowering its
+          distance is O(log V). With a plain heap, both would be a linear scan per edge relaxation.
+        - With `heap=PairingHeap`, lowering a distance is (amortized) constant time in practice, which pays off on
+          dense graphs where there are many more edge relaxations than vertices.
+        - With integer weights, the queue needs no comparisons at all: Dial's `BucketQueue` makes every queue
+          operation O(1) (O(E + V * C) overall for a largest weight C), and a `RadixHeap` makes pops O(log C).
     Space complexity: O(E + V)
+
+    Vertices are only pushed onto the queue once they are reached, so the queue never needs to hold unreachable
+    vertices. A vertex is settled when it is popped, and edges into settled vertices are not relaxed again. With
+    non-negative weights, a settled vertex's distance could not improve anyway. With negative weights, the distances
+    found may not be the shortest, but each vertex is still only popped once, so the search always ends (even on a
+    negative cycle). Use `bellman_ford()` or `spfa()` for graphs with negative weights.
+
+    :param graph: The graph to search. A `FrozenGraph` snapshot is searched by integer vertex id over its flat
+        adjacency arrays, which avoids building a list of neighbors per vertex and hashing vertices on every relaxation.
+    :param heap: The priority queue type (or function making an empty queue) to use. It must support `push`, `pop`,
+        `update_value`, `is_empty` and `in` checks of vertices, like `IndexedMinHeap` and `PairingHeap` do. By default,
+        the queue is picked by `select_queue()` based on the edge weights.
     """
-    if start not in graph:
-        raise KeyError(f'Value \'{start}\' not present in graph.')
+    return _dijkstra(graph, [start], heap)
 
-    distances = {start: 0}
-    predecessors = {start: None}
-    queue = MinHeap()
 
-    for v in graph.nodes():
-        if v != start:
-            distances[v] = float('inf')
-            predecessors[v] = None
+def multi_source_dijkstra(graph: Graph | FrozenGraph, sources: Iterable,
+                          heap: Callable = None) -> (dict[Any, int|float], dict[Any, Any], dict[Any, Any]):
+    """
+    Dijkstra's Algorithm from several sources at once, finding the distance from every vertex to its nearest source.
+
+    Every source starts on the queue with a distance of 0, as if they were all joined to one extra vertex by edges of
+    weight 0, so the search costs the same as a single run of `dijkstra()` rather than one per source. This answers
+    nearest facility queries: which of a set of sources is closest to each vertex, and how far away it is.
 
-        queue.push(v, distances[v])
+    Time complexity: that of `dijkstra()`, plus O(V) to find each vertex's nearest source.
+    Space complexity: O(V)
+    :param sources: The vertices to search from.
+    :param heap: The priority queue type to use, as for `dijkstra()`.
+    :return: The distance from each vertex to its nearest source, each vertex's predecessor on the path from that
+        source (`None` for the sources themselves and unreachable vertices), and each vertex's nearest source (`None`
+        if no source reaches it)
+    :raises ValueError: If `sources` is empty.
+    """
+    sources = list(dict.fromkeys(sources))
+    if not sources:
+        raise ValueError('At least one source vertex is required.')
+    distances, predecessors = _dijkstra(graph, sources, heap)
+
+    nearest = {source: source for source in sources}
+    for v in distances:
+        # Walk up the shortest path tree to a vertex whose nearest source is known (or to an unreachable vertex), then
+        # label every vertex on the way, so each vertex is walked over once
+        walk = [v]
+        while walk[-1] not in nearest and predecessors[walk[-1]] is not None:
+            walk.append(predecessors[walk[-1]])
+        source = nearest.get(walk[-1])
+        for u in walk:
+            nearest[u] = source
+    return distances, predecessors, {v: nearest[v] for v in distances}
+
+
+def _dijkstra(graph: Graph | FrozenGraph, sources: list, heap: Callable | None) -> (dict[Any, int], dict[Any, Any]):
+    for v in sources:
+        if v not in graph:
+            raise KeyError(f'Value \'{v}\' not present in graph.')
+    if heap is None:
+        heap = select_queue(graph)
+
+    if isinstance(graph, FrozenGraph):
+        return _dijkstra_frozen(graph, sources, heap)
+
+    distances = {v: float('inf') for v in graph.nodes()}
+    predecessors = {v: None for v in distances}
+    settled = set()
+    queue = heap()
+    for v in sources:
+        distances[v] = 0
+        queue.push(v, 0)
 
     while not queue.is_empty():
-        u = queue.pop()[0]
+        u = queue.pop()
+        settled.add(u)
         for v, w in graph.neighbors(u):
             alt = distances[u] + w
-            if v in queue and alt < distances[v]:
+            if alt < distances[v] and v not in settled:
                 distances[v] = alt
                 predecessors[v] = u
-                queue.update_value(v, distances[v])
+                if v in queue:
+                    queue.update_value(v, alt)
+                else:
+                    queue.push(v, alt)
 
     return distances, predecessors
 
 
+def select_queue(graph: Graph | FrozenGraph) -> Callable:
+    """
+    Pick the fastest priority queue for running Dijkstra's Algorithm on `graph`, based on its edge weights.
+
+    If every weight is a non-negative integer, no priority in the queue is ever further than the largest weight from the
+    last popped one, and priorities never drop below it. Weights up to `_BUCKET_QUEUE_MAX_WEIGHT` get Dial's
+    `BucketQueue`, which has one bucket per possible weight, and larger ones a `RadixHeap`. Any other weights get an
+    `IndexedMinHeap`, which unlike those two accepts priorities below the last popped one, as negative weights give
+    (see `dijkstra()` for how they are searched). Checking the weights takes O(E) time, stopping at the first weight
+    that is not a non-negative integer. The choice is cached until the graph's `version` changes, so repeated searches
+    of the same graph (as by `ShortestPathCache`) only check it once.
+    :return: A function making an empty queue
+    """
+    version = graph.version if isinstance(graph, Graph) else 0
+    cached = _selected_queues.get(graph)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    queue = _select_queue(graph)
+    _selected_queues[graph] = (version, queue)
+    return queue
+
+
+# The queue picked by `select_queue()` for each graph, along with the graph's version when it was picked
+_selected_queues = weakref.WeakKeyDictionary()
+
+
+def _select_queue(graph: Graph | FrozenGraph) -> Callable:
+    if isinstance(graph, FrozenGraph) and getattr(graph.weights, 'typecode', None) == 'q':
+        if min(graph.weights, default=0) < 0:
+            return IndexedMinHeap
+        max_weight = max(graph.weights, default=0)
+    else:
+        weights = graph.weights if isinstance(graph, FrozenGraph) else (w for _, _, w in graph.iter_edges())
+        max_weight = 0
+        for w in weights:
+            if type(w) is not int or w < 0:
+                return IndexedMinHeap
+            if w > max_weight:
+                max_weight = w
+    if max_weight <= _BUCKET_QUEUE_MAX_WEIGHT:
+        return functools.partial(BucketQueue, max_weight)
+    return RadixHeap
+
+
+def _dijkstra_frozen(graph: FrozenGraph, sources: list, heap: Callable) -> (dict[Any, int], dict[Any, Any]):
+    vertices, offsets, targets, weights = graph.vertices, graph.offsets, graph.targets, graph.weights
+
+    distances = [float('inf')] * len(vertices)
+    predecessors = [None] * len(vertices)
+    settled = [False] * len(vertices)
+    queue = heap()
+    for source in map(graph.vertex_id, sources):
+        distances[source] = 0
+        queue.push(source, 0)
+
+    while not queue.is_empty():
+        u = queue.pop()
+        settled[u] = True
+        for pos in range(offsets[u], offsets[u + 1]):
+            v = targets[pos]
+            alt = distances[u] + weights[pos]
+            if alt < distances[v] and not settled[v]:
+                distances[v] = alt
+                predecessors[v] = u
+                if v in queue:
+                    queue.update_value(v, alt)
+                else:
+                    queue.push(v, alt)
+
+    # Translate vertex ids back to vertices
+    return ({vertices[v]: d for v, d in enumerate(distances)},
+            {vertices[v]: None if p is None else vertices[p] for v, p in enumerate(predecessors)})
+
+
+def reconstruct_path(predecessors: dict[Any, Any], source, target) -> list:
+    """
+    Walk `predecessors` (as returned by `dijkstra()`) back from `target` to `source`.
+    :return: The vertices on the shortest path from `source` to `target`, inclusive, or an empty list if `target` is
+        not reachable from `source`
+    """
+    path = [target]
+    while path[-1] != source:
+        previous = predecessors.get(path[-1])
+        if previous is None:
+            return []
+        path.append(previous)
+    path.reverse()
+    return path
+
+
+def shortest_path(graph: Graph | FrozenGraph, source, target, heap: type = IndexedMinHeap) -> (int|float, list):
+    """
+    Dijkstra's Algorithm for a single pair of vertices, stopping as soon as `target` is settled.
+
+    Unlike `dijkstra()`, vertices are only pushed onto the queue when they are first reached, so the work done is
+    proportional to the part of the graph closer to `source` than `target` is, rather than to the whole graph.
+    A vertex's distance can only be lowered while it is queued: with non-negative weights, no relaxation can improve on
+    the distance of a vertex that has already been popped.
+
+    Time complexity: O(E' log V') where E' and V' are the edges and vertices closer to `source` than `target`.
+    Space complexity: O(V')
+    :return: The distance from `source` to `target` and the vertices on the shortest path between them, or
+        `(inf, [])` if `target` is not reachable from `source`
+    """
+    for v in (source, target):
+        if v not in graph:
+            raise KeyError(f'Value \'{v}\' not present in graph.')
+
+    distances = {source: 0}
+    predecessors = {source: None}
+    queue = heap()
+    queue.push(source, 0)
+
+    while not queue.is_empty():
+        u = queue.pop()
+        if u == target:
+            return distances[u], reconstruct_path(predecessors, source, target)
+        for v, w in graph.neighbors(u):
+            alt = distances[u] + w
+            if v not in distances:
+                distances[v] = alt
+                predecessors[v] = u
+                queue.push(v, alt)
+            elif alt < distances[v]:
+                distances[v] = alt
+                predecessors[v] = u
+                queue.update_value(v, alt)
+
+    return float('inf'), []
+
+
+def bidirectional_shortest_path(graph: Graph | FrozenGraph, source, target,
+                                heap: type = IndexedMinHeap) -> (int|float, list):
+    """
+    Dijkstra's Algorithm for a single pair of vertices, searching forwards from `source` and backwards from `target` at
+    the same time.
+
+    Each step expands whichever search has the smaller queue. Every time a vertex is reached by both searches, the path
+    through it is a candidate for the shortest path. The search stops once the two queues' smallest distances add up
+    to at least the best candidate, since any other path would have to pass through a vertex that is further away
+    still. Both searches only cover roughly a ball around their end, which on large graphs is far fewer vertices than
+    one ball reaching all the way from `source` to `target`.
+
+    The backward search follows edges in reverse with `in_neighbors()`, so directed `Graph`s should be created with
+    `track_in_edges=True`. A directed `FrozenGraph` has no reverse edges to search.
+
+    Time complexity: O(E' log V') where E' and V' are the edges and vertices covered by the two searches.
+    Space complexity: O(V')
+    :return: The distance from `source` to `target` and the vertices on the shortest path between them, or
+        `(inf, [])` if `target` is not reachable from `source`
+    :raises TypeError: If `graph` is a directed `FrozenGraph`.
+    """
+    for v in (source, target):
+        if v not in graph:
+            raise KeyError(f'Value \'{v}\' not present in graph.')
+    if isinstance(graph, FrozenGraph):
+        if graph.directed:
+            raise TypeError('A directed FrozenGraph cannot be searched backwards.')
+        backward_neighbors = graph.neighbors
+    else:
+        backward_neighbors = graph.in_neighbors
+    if source == target:
+        return 0, [source]
+
+    forward_distances, backward_distances = {source: 0}, {target: 0}
+    # Backward "predecessors" are the next vertices on the way to `target`
+    predecessors, successors = {source: None}, {target: None}
+    forward_queue, backward_queue = heap(), heap()
+    forward_queue.push(source, 0)
+    backward_queue.push(target, 0)
+    best, meeting = float('inf'), None
+
+    while not forward_queue.is_empty() and not backward_queue.is_empty():
+        if forward_distances[forward_queue.peek()] + backward_distances[backward_queue.peek()] >= best:
+            break
+        if forward_queue.size() <= backward_queue.size():
+            candidate = _expand(forward_queue, forward_distances, predecessors, graph.neighbors, backward_distances)
+        else:
+            candidate = _expand(backward_queue, backward_distances, successors, backward_neighbors, forward_distances)
+        if candidate is not None and candidate[0] < best:
+            best, meeting = candidate
+
+    if meeting is None:
+        return float('inf'), []
+    to_target = reconstruct_path(successors, target, meeting)
+    to_target.reverse()
+    return best, reconstruct_path(predecessors, source, meeting) + to_target[1:]
+
+
+def _expand(queue, distances: dict, predecessors: dict, neighbors, other_distances: dict) -> Tuple[int|float, Any] | None:
+    """
+    Pop the closest vertex of one side of a bidirectional search and relax its edges.
+    :return: The shortest `(distance, vertex)` through a vertex that both sides have reached, among the neighbors
+        relaxed, or `None` if none of them have been reached by the other side
+    """
+    u = queue.pop()
+    best = None
+    for v, w in neighbors(u):
+        alt = distances[u] + w
+        if v not in distances:
+            distances[v] = alt
+            predecessors[v] = u
+            queue.push(v, alt)
+        elif alt < distances[v]:
+            distances[v] = alt
+            predecessors[v] = u
+            queue.update_value(v, alt)
+        if v in other_distances and (best is None or distances[v] + other_distances[v] < best[0]):
+            best = distances[v] + other_distances[v], v
+    return best
+
+
+# The graph and queue type each worker process of `batch_dijkstra()` searches, sent once when the process starts
+_worker_graph = None
+_worker_heap = None
+
+
+def _init_worker(graph: FrozenGraph, heap: Callable):
+    global _worker_graph, _worker_heap
+    _worker_graph, _worker_heap = graph, heap
+
+
+def _worker_dijkstra(source) -> (dict[Any, int], dict[Any, Any]):
+    return _dijkstra_frozen(_worker_graph, [source], _worker_heap)
+
+
+def batch_dijkstra(graph: Graph | FrozenGraph, sources: Iterable, heap: Callable = None,
+                   processes: int | None = None) -> dict[Any, Tuple[dict[Any, int], dict[Any, Any]]]:
+    """
+    Run `dijkstra()` from each of `sources`, spread over a pool of worker processes.
+
+    A `Graph` is frozen first, and the snapshot is sent to each worker once, when it starts, rather than with every
+    source. Each result has to be pickled back to this process, which costs O(V) per source on top of the search, so
+    the pool pays off for many sources on graphs where a search takes more than a few milliseconds.
+
+    :param sources: The vertices to search from.
+    :param heap: The priority queue type to use, as for `dijkstra()`. It must be picklable, which the types picked by
+        `select_queue()` are.
+    :param processes: The number of worker processes. Defaults to the number of CPUs. With 1, the searches are run in
+        this process, without a pool.
+    :return: A dict from each source to its distances and predecessors, as returned by `dijkstra()`
+    """
+    sources = list(dict.fromkeys(sources))
+    for v in sources:
+        if v not in graph:
+            raise KeyError(f'Value \'{v}\' not present in graph.')
+    if not isinstance(graph, FrozenGraph):
+        graph = graph.freeze()
+    if heap is None:
+        heap = select_queue(graph)
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return {source: _dijkstra_frozen(graph, [source], heap) for source in sources}
+    # A few chunks per process, so that the processes finish at roughly the same time
+    chunk_size = max(1, len(sources) // (4 * processes))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                                initargs=(graph, heap)) as executor:
+        return dict(zip(sources, executor.map(_worker_dijkstra, sources, chunksize=chunk_size)))
+
+
+class ShortestPathCache[T]:
+    """
+    An opt-in cache of the shortest path trees from a graph's most recently used sources, as computed by `dijkstra()`.
+
+    Every lookup first compares the graph's `version` with the one the cached trees were computed from. If the graph
+    has been mutated since, the whole cache is cleared, since adding or removing a single edge can change the distances
+    from any source. A `FrozenGraph` cannot be mutated, so its trees only leave the cache when evicted.
+
+    The cached dicts are returned as they are, so they must not be modified.
+
+    Time Complexities:
+        - Cached lookup: `O(1)`
+        - Uncached lookup: that of `dijkstra()`
+    """
+    def __init__(self, graph: Graph[T] | FrozenGraph[T], max_size: int = 16, heap: Callable = None):
+        """
+        :param graph: The graph to search.
+        :param max_size: The number of shortest path trees to keep. Each takes O(V) space.
+        :param heap: The priority queue type to use, as for `dijkstra()`.
+        """
+        self.graph = graph
+        self.heap = heap
+        self._trees = LRUCache[T, Tuple[dict[T, int], dict[T, T]]](max_size=max_size)
+        self._version = self._graph_version()
+
+    def __contains__(self, source: T) -> bool:
+        return self._graph_version() == self._version and source in self._trees
+
+    def _graph_version(self) -> int:
+        return self.graph.version if isinstance(self.graph, Graph) else 0
+
+    def _validate(self):
+        version = self._graph_version()
+        if version != self._version:
+            self._trees.clear()
+            self._version = version
+
+    def tree(self, source: T) -> (dict[T, int], dict[T, T]):
+        """
+        Get the distances and predecessors from `source`, as returned by `dijkstra()`.
+        """
+        self._validate()
+        tree = self._trees.get(source)
+        if tree is None:
+            tree = dijkstra(self.graph, source, self.heap)
+            self._trees.put(source, tree)
+        return tree
+
+    def prefetch(self, sources: Iterable[T], processes: int | None = None):
+        """
+        Compute the trees from every source in `sources` not already cached with `batch_dijkstra()`, and cache them.
+        Only the last `max_size` of them are kept.
+        """
+        self._validate()
+        missing = [source for source in dict.fromkeys(sources) if source not in self._trees]
+        if missing:
+            for source, tree in batch_dijkstra(self.graph, missing, self.heap, processes).items():
+                self._trees.put(source, tree)
+
+    def distance(self, source: T, target: T) -> int|float:
+        distances = self.tree(source)[0]
+        if target not in distances:
+            raise KeyError(f'Value \'{target}\' not present in graph.')
+        return distances[target]
+
+    def shortest_path(self, source: T, target: T) -> (int|float, list[T]):
+        """
+        :return: The distance from `source` to `target` and the vertices on the shortest path between them, or
+            `(inf, [])` if `target` is not reachable from `source`
+        """
+        distance = self.distance(source, target)
+        if distance == float('inf'):
+            return distance, []
+        return distance, reconstruct_path(self.tree(source)[1], source, target)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get a snapshot of the underlying `LRUCache`'s counters (see `LRUCache.stats()`).
+        """
+        return self._trees.stats()
+
+
 if __name__ == '__main__':
     graph = Graph[str](directed= True)
     graph.add_vertex('A')
@@ -58,4 +482,107 @@ if __name__ == '__main__':
 
     dist, pred = dijkstra(graph, 'A')
     print('Distances from A: ', dist)
-    print('Predecessors: ', pred)
\ No newline at end of file
+    print('Predecessors: ', pred)
+    print('Path from A to D: ', reconstruct_path(pred, 'A', 'D'))
+    print('shortest_path(A, D): ', shortest_path(graph, 'A', 'D'))
+    dist, pred, nearest = multi_source_dijkstra(graph, ['B', 'D'])
+    print('Distances from B or D: ', dist)
+    print('Nearest of B and D: ', nearest)
+    cache = ShortestPathCache[str](graph)
+    print('Cached shortest_path(A, D): ', cache.shortest_path('A', 'D'))
+    graph.add_edge('A', 'D', 1)
+    print('Cached shortest_path(A, D) after adding (A, D, 1): ', cache.shortest_path('A', 'D'))
+    # Weights above 1024 get a RadixHeap, which has to cope with path lengths beyond 64 bits
+    huge_graph = Graph[str]()
+    huge_graph.add_edges([('A', 'B', 2 ** 70), ('B', 'C', 5), ('A', 'C', 2 ** 71)], auto_create_vertices=True)
+    dist, pred = dijkstra(huge_graph, 'A')
+    assert dist['C'] == 2 ** 70 + 5
+    print(f'Distances with weights of 2**70 ({select_queue(huge_graph).__name__}): ', dist)
+
+    print()
+
+    n = 1000
+    print(f'Benchmark: dense random graph with {n} vertices and ~{n * (n - 1) // 2} edges')
+    dense_graph = Graph[int](directed=True)
+    for v in range(n):
+        dense_graph.add_vertex(v)
+    for u in range(n):
+        for v in range(n):
+            if u != v and random.random() < 0.5:
+                dense_graph.add_edge(u, v, random.randint(1, 1000))
+    for heap_type in (IndexedMinHeap, PairingHeap):
+        start = time.perf_counter()
+        dijkstra(dense_graph, 0, heap=heap_type)
+        print(f'  {heap_type.__name__}: {time.perf_counter() - start:.2f}s')
+
+    n = 100_000
+    m = 500_000
+    print(f'Benchmark: sparse random graph with {n} vertices and {m} edges')
+    sparse_graph = Graph[int](directed=True, capacity=n)
+    for v in range(n):
+        sparse_graph.add_vertex(v)
+    for _ in range(m):
+        sparse_graph.add_edge(random.randrange(n), random.randrange(n), random.randint(1, 1000))
+    start = time.perf_counter()
+    dijkstra(sparse_graph, 0)
+    print(f'  Graph:       {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    frozen_graph = sparse_graph.freeze()
+    print(f'  freeze():    {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    dijkstra(frozen_graph, 0)
+    print(f'  FrozenGraph: {time.perf_counter() - start:.2f}s')
+
+    n = 200_000
+    m = 2_000_000
+    print(f'Benchmark: integer weights, random graph with {n} vertices and {m} edges (FrozenGraph)')
+    integer_graph = Graph[int](directed=True, capacity=n)
+    integer_graph.add_vertices(range(n))
+    integer_graph.add_edges((random.randrange(n), random.randrange(n), random.randint(1, 100)) for _ in range(m))
+    integer_graph = integer_graph.freeze()
+    print(f'  select_queue(): {select_queue(integer_graph)}')
+    for queue_type in (IndexedMinHeap, functools.partial(BucketQueue, 100), RadixHeap):
+        start = time.perf_counter()
+        dijkstra(integer_graph, 0, heap=queue_type)
+        elapsed = time.perf_counter() - start
+        name = getattr(queue_type, '__name__', None) or queue_type.func.__name__
+        print(f'  {name + ":":<15} {elapsed:.2f}s ({m / elapsed:,.0f} edges/s)')
+
+    n = 50_000
+    m = 150_000
+    queries = 10
+    print(f'Benchmark: {queries} point-to-point queries on a random graph with {n} vertices and {m} edges')
+    road_graph = Graph[int](capacity=n)
+    road_graph.add_vertices(range(n))
+    road_graph.add_edges((random.randrange(n), random.randrange(n), random.randint(1, 1000)) for _ in range(m))
+    pairs = [(random.randrange(n), random.randrange(n)) for _ in range(queries)]
+    start = time.perf_counter()
+    for source, target in pairs:
+        dist, pred = dijkstra(road_graph, source)
+        reconstruct_path(pred, source, target)
+    print(f'  dijkstra():                    {(time.perf_counter() - start) / queries * 1000:.1f}ms/query')
+    for search in (shortest_path, bidirectional_shortest_path):
+        start = time.perf_counter()
+        for source, target in pairs:
+            search(road_graph, source, target)
+        print(f'  {search.__name__ + "():":<30} {(time.perf_counter() - start) / queries * 1000:.1f}ms/query')
+
+    hubs = random.sample(range(n), 32)
+    print(f'Benchmark: {len(hubs)} sources on the same graph')
+    start = time.perf_counter()
+    for hub in hubs:
+        dijkstra(road_graph, hub)
+    print(f'  dijkstra() per source:      {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    multi_source_dijkstra(road_graph, hubs)
+    print(f'  multi_source_dijkstra():    {time.perf_counter() - start:.2f}s (distances to the nearest source only)')
+    for processes in sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        batch_dijkstra(road_graph, hubs, processes=processes)
+        print(f'  {f"batch_dijkstra({processes=}):":<28} {time.perf_counter() - start:.2f}s')
+    cache = ShortestPathCache[int](road_graph, max_size=len(hubs))
+    cache.prefetch(hubs, processes=1)
+    start = time.perf_counter()
+    for hub in hubs:
+        cache.distance(hub, 0)
+    print(f'  ShortestPathCache hits:     {(time.perf_counter() - start) / len(hubs) * 1e6:.1f}us/query')
@@ -1,8 +1,9 @@
+from ds.frozen_graph import FrozenGraph
 from ds.graph import Graph
 from alg.union_find import union_find
 
 
-def kruskal(graph: Graph[int]) -> Graph[int]:
+def kruskal(graph: Graph[int] | FrozenGraph[int]) -> Graph[int]:
     """
     Kruskal's algorithm for finding the minimum spanning tree of a graph.
 
@@ -12,7 +13,7 @@ def kruskal(graph: Graph[int]) -> Graph[int]:
           but since the inverse Ackermann function grows very slowly, we can drop this term for practical purposes)
     Space complexity: O(V + E) where V is the number of vertices in the graph and E is the number of edges.
     """
-    mst = Graph[int](directed= False)
+    mst = Graph[int](directed= False, capacity=len(graph.nodes()))
     edges = graph.edges()
     edges.sort(key=lambda edge: edge[2]) # Sort edges by weight
 
@@ -24,7 +25,7 @@ def kruskal(graph: Graph[int]) -> Graph[int]:
     for edge in edges:
         mst.add_edge(edge[0], edge[1], edge[2])
         if not union_find(mst):
-            if len(mst.edges()) == len(graph.nodes()) - 1:
+            if mst.edge_count == len(graph.nodes()) - 1:
                 return mst
             continue
         mst.remove_edge(edge[0], edge[1])
@@ -1,3 +1,8 @@
+from collections import deque
+from typing import Any
+
+from ds.frozen_graph import FrozenGraph
+from ds.graph import Graph
 from ds.tree import TreeNode
 
 
@@ -16,6 +21,46 @@ def bfs(root: TreeNode, target) -> TreeNode | None:
     return None
 
 
+def graph_bfs(graph: Graph | FrozenGraph, start) -> dict[Any, int]:
+    """
+    Breadth-first search over a graph, finding the number of edges on the shortest path from `start` to every
+    reachable vertex.
+
+    A `FrozenGraph` snapshot is searched by integer vertex id over its flat adjacency arrays.
+
+    Time complexity: O(V + E)
+    Space complexity: O(V)
+    :return: A dict mapping each vertex reachable from `start` to its distance (in edges) from `start`
+    """
+    if start not in graph:
+        raise KeyError(f'Value \'{start}\' not present in graph.')
+
+    if isinstance(graph, FrozenGraph):
+        targets = graph.targets
+        source = graph.vertex_id(start)
+        hops = [-1] * len(graph)
+        hops[source] = 0
+        q = deque([source])
+        while q:
+            u = q.popleft()
+            for pos in graph.neighbor_range(u):
+                v = targets[pos]
+                if hops[v] < 0:
+                    hops[v] = hops[u] + 1
+                    q.append(v)
+        return {graph.vertices[v]: h for v, h in enumerate(hops) if h >= 0}
+
+    hops = {start: 0}
+    q = deque([start])
+    while q:
+        u = q.popleft()
+        for v, _ in graph.neighbors(u):
+            if v not in hops:
+                hops[v] = hops[u] + 1
+                q.append(v)
+    return hops
+
+
 if __name__ == '__main__':
     root = TreeNode(1)
     root.children.append(TreeNode(2))
@@ -26,4 +71,14 @@ if __name__ == '__main__':
     if bfs(root, 4):
         print('Found')
     else:
-        print('Not found')
\ No newline at end of file
+        print('Not found')
+
+    graph = Graph[int]()
+    for v in range(1, 6):
+        graph.add_vertex(v)
+    graph.add_edge(1, 2)
+    graph.add_edge(1, 3)
+    graph.add_edge(2, 4)
+    graph.add_edge(4, 5)
+    print('Hops from 1: ', graph_bfs(graph, 1))
+    print('Hops from 1 (frozen): ', graph_bfs(graph.freeze(), 1))
@@ -0,0 +1,277 @@
+import importlib
+import random
+import time
+from typing import Any
+
+from ds.frozen_graph import FrozenGraph
+from ds.graph import Graph
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The module name has a hyphen, so it cannot be imported with an import statement
+_bellman_ford = importlib.import_module('alg.bellman-ford')
+NegativeCycleError = _bellman_ford.NegativeCycleError
+
+
+def edge_arrays(graph: Graph | FrozenGraph) -> (list, 'np.ndarray', 'np.ndarray', 'np.ndarray'):
+    """
+    Pack the edges of a graph into parallel NumPy arrays of their start and end vertex ids and weights.
+
+    A `Graph` is frozen first. The arrays are read straight out of the `FrozenGraph`'s CSR layout: `dst` and `weight`
+    are its `targets` and `weights` arrays, and `src` repeats each vertex id once per edge leaving it. Undirected edges
+    appear once in each direction.
+    :return: The vertices (indexed by id), and the `src`, `dst` and `weight` arrays
+    :raises ImportError: If NumPy is not installed.
+    :raises TypeError: If the weights are not all numbers.
+    """
+    if np is None:
+        raise ImportError('edge_arrays() requires NumPy.')
+    if not isinstance(graph, FrozenGraph):
+        graph = graph.freeze()
+    offsets = np.asarray(graph.offsets, dtype=np.int64)
+    src = np.repeat(np.arange(len(graph.vertices)), np.diff(offsets))
+    dst = np.asarray(graph.targets, dtype=np.int64)
+    weight = np.asarray(graph.weights)
+    if len(weight) and weight.dtype.kind not in 'iuf':
+        raise TypeError('Only graphs whose weights are all numbers can be packed into arrays.')
+    return graph.vertices, src, dst, weight
+
+
+def _to_distance(value, integer: bool) -> int|float:
+    """
+    Turn a distance read out of a float array back into an `int` if the weights are integers. Python numbers are left
+    alone, so the exact `int` distances of the pure Python engine keep their precision beyond 2**53.
+    """
+    if np is not None and isinstance(value, np.generic):
+        return int(value) if integer and np.isfinite(value) else float(value)
+    if integer and type(value) is float and value != float('inf'):
+        return int(value)
+    return value
+
+
+def vectorized_bellman_ford(graph: Graph | FrozenGraph, start) -> (dict[Any, int], dict[Any, Any]):
+    """
+    Bellman-Ford Algorithm with each pass relaxing every edge at once, as whole-array NumPy operations over the packed
+    edges from `edge_arrays()`.
+
+    A pass computes `dist[src] + weight` for every edge and takes the minimum into each end vertex with
+    `np.minimum.at()`, so every edge sees the distances from the end of the previous pass. After k passes, each
+    distance is the shortest over paths of at most k edges, and passes stop as soon as one changes nothing. Each
+    improved vertex's predecessor is the start of an edge achieving its new distance.
+
+    Falls back to `bellman_ford()` if NumPy is not installed.
+
+    Time complexity: O(E * V) in the worst case, O(E * k) when shortest paths have at most k edges, with the work of
+    each pass done in C.
+    Space complexity: O(E + V)
+    :return: The distances and predecessors, as returned by `bellman_ford()`
+    :raises NegativeCycleError: If a negative cycle is reachable from `start`.
+    """
+    if start not in graph:
+        raise KeyError(f'Value \'{start}\' not present in graph.')
+    if np is None:
+        return _bellman_ford.bellman_ford(graph, start)
+
+    if not isinstance(graph, FrozenGraph):
+        graph = graph.freeze()
+    vertices, src, dst, weight = edge_arrays(graph)
+    n = len(vertices)
+    distances = np.full(n, np.inf)
+    distances[graph.vertex_id(start)] = 0
+    predecessors = np.full(n, -1, dtype=np.int64)
+
+    # One pass more than needed without negative cycles: if it still lowers a distance, there is one
+    for _ in range(n):
+        candidates = distances[src] + weight
+        relaxed = distances.copy()
+        np.minimum.at(relaxed, dst, candidates)
+        improved = relaxed < distances
+        if not improved.any():
+            break
+        # Of the edges achieving a new distance, the last one written wins
+        achieving = improved[dst] & (candidates == relaxed[dst])
+        predecessors[dst[achieving]] = src[achieving]
+        distances = relaxed
+    else:
+        # Each distance is the length of its predecessor path, so a distance below every path of at most V - 1 edges
+        # must come from a cycle of predecessors
+        cycle = _bellman_ford._predecessor_cycle({v: None if p < 0 else p for v, p in enumerate(predecessors.tolist())})
+        raise NegativeCycleError([vertices[v] for v in cycle])
+
+    integer = weight.dtype.kind in 'iu'
+    return ({vertices[v]: _to_distance(d, integer) for v, d in enumerate(distances.tolist())},
+            {vertices[v]: None if p < 0 else vertices[p] for v, p in enumerate(predecessors.tolist())})
+
+
+class AllPairsShortestPaths[T]:
+    """
+    The distances and shortest paths between every pair of vertices of a graph, as computed by `floyd_warshall()`.
+
+    Both are held as V x V matrices indexed by vertex id: `distances[i][j]` is the distance from vertex `i` to vertex
+    `j`, and `predecessors[i][j]` is the vertex before `j` on the shortest path from `i` (or -1 if there is none). They
+    are NumPy arrays if NumPy is installed, or lists of lists otherwise.
+
+    Time Complexities:
+        - Distance: `O(1)`
+        - Shortest path: `O(k)` where `k` is the number of edges on the path
+    """
+    def __init__(self, vertices: list[T], distances, predecessors, integer: bool):
+        self.vertices = vertices
+        self.distances = distances
+        self.predecessors = predecessors
+        self._ids = {vertex: i for i, vertex in enumerate(vertices)}
+        self._integer = integer
+
+    def _id(self, value: T) -> int:
+        if value not in self._ids:
+            raise KeyError(f'Value \'{value}\' not present in graph.')
+        return self._ids[value]
+
+    def distance(self, source: T, target: T) -> int|float:
+        return _to_distance(self.distances[self._id(source)][self._id(target)], self._integer)
+
+    def shortest_path(self, source: T, target: T) -> (int|float, list[T]):
+        """
+        :return: The distance from `source` to `target` and the vertices on the shortest path between them, or
+            `(inf, [])` if `target` is not reachable from `source`
+        """
+        distance = self.distance(source, target)
+        if distance == float('inf'):
+            return distance, []
+        i, j = self._id(source), self._id(target)
+        row = self.predecessors[i]
+        path = [j]
+        while path[-1] != i:
+            path.append(int(row[path[-1]]))
+        return distance, [self.vertices[v] for v in reversed(path)]
+
+
+def floyd_warshall(graph: Graph | FrozenGraph) -> AllPairsShortestPaths:
+    """
+    Floyd-Warshall Algorithm for the shortest paths between every pair of vertices, over a dense distance matrix.
+
+    For each vertex `k` in turn, every path `i -> j` is compared with the path `i -> k -> j`. With NumPy, each `k` is
+    a single V x V array operation: the column `distances[:, k]` plus the row `distances[k, :]` broadcast against the
+    whole matrix, updated in place where it is shorter. Without NumPy, the same loop runs in pure Python over lists,
+    which is only practical for a few hundred vertices. The matrices take O(V^2) space, which is 144MB (with NumPy)
+    for 3000 vertices.
+
+    Time complexity: O(V^3)
+    Space complexity: O(V^2)
+    :raises NegativeCycleError: If the graph has a negative cycle, in which case the cycle is found with
+        `find_negative_cycle()`.
+    """
+    if not isinstance(graph, FrozenGraph):
+        graph = graph.freeze()
+    if np is None:
+        result = _floyd_warshall_python(graph)
+        negative = any(result.distances[i][i] < 0 for i in range(len(graph.vertices)))
+    else:
+        result = _floyd_warshall_numpy(graph)
+        negative = bool((result.distances.diagonal() < 0).any())
+    if negative:
+        raise NegativeCycleError(_bellman_ford.find_negative_cycle(graph))
+    return result
+
+
+def _floyd_warshall_numpy(graph: FrozenGraph) -> AllPairsShortestPaths:
+    vertices, src, dst, weight = edge_arrays(graph)
+    n = len(vertices)
+    distances = np.full((n, n), np.inf)
+    np.fill_diagonal(distances, 0)
+    distances[src, dst] = weight
+    predecessors = np.full((n, n), -1, dtype=np.int32)
+    predecessors[src, dst] = src
+
+    # Buffers reused by every iteration, rather than allocating two V x V temporaries per vertex
+    through = np.empty((n, n))
+    shorter = np.empty((n, n), dtype=bool)
+    for k in range(n):
+        np.add(distances[:, k, None], distances[None, k, :], out=through)
+        np.less(through, distances, out=shorter)
+        np.copyto(distances, through, where=shorter)
+        # On a path through k, the vertex before j is the one before j on the path from k
+        np.copyto(predecessors, predecessors[k].copy(), where=shorter)
+
+    return AllPairsShortestPaths(vertices, distances, predecessors, weight.dtype.kind in 'iu')
+
+
+def _floyd_warshall_python(graph: FrozenGraph) -> AllPairsShortestPaths:
+    vertices, offsets, targets, weights = graph.vertices, graph.offsets, graph.targets, graph.weights
+    n = len(vertices)
+    distances = [[float('inf')] * n for _ in range(n)]
+    predecessors = [[-1] * n for _ in range(n)]
+    for u in range(n):
+        distances[u][u] = 0
+        for pos in range(offsets[u], offsets[u + 1]):
+            distances[u][targets[pos]] = weights[pos]
+            predecessors[u][targets[pos]] = u
+
+    for k in range(n):
+        row_k, predecessors_k = distances[k], predecessors[k]
+        for i in range(n):
+            through_k = distances[i][k]
+            if through_k == float('inf'):
+                continue
+            row_i, predecessors_i = distances[i], predecessors[i]
+            for j in range(n):
+                alt = through_k + row_k[j]
+                if alt < row_i[j]:
+                    row_i[j] = alt
+                    predecessors_i[j] = predecessors_k[j]
+
+    return AllPairsShortestPaths(vertices, distances, predecessors, all(type(w) is int for w in weights))
+
+
+if __name__ == '__main__':
+    graph = Graph[str](directed=True)
+    graph.add_vertices('ABCDE')
+    graph.add_edges([('A', 'B', -1), ('A', 'C', 4), ('B', 'C', 3), ('B', 'D', 2), ('B', 'E', 2), ('D', 'C', 5),
+                     ('D', 'B', 1), ('E', 'D', -3)])
+    print('NumPy installed: ', np is not None)
+    print('vectorized_bellman_ford(): ', vectorized_bellman_ford(graph, 'A'))
+    paths = floyd_warshall(graph)
+    print('floyd_warshall() from E to C: ', paths.shortest_path('E', 'C'))
+    graph.add_edge('C', 'A', -5)
+    for search in (lambda g: vectorized_bellman_ford(g, 'A'), floyd_warshall):
+        try:
+            search(graph)
+        except NegativeCycleError as e:
+            print('Caught NegativeCycleError, cycle: ', e.cycle)
+
+    if np is None:
+        print('Install NumPy to run the benchmarks.')
+        raise SystemExit()
+
+    print()
+
+    # Edges only go right and down, so there are no cycles, negative or otherwise. The vertices are added in a random
+    # order, since edges are listed by vertex and in row order a single pass of bellman_ford() would settle the grid
+    size = 200
+    print(f'Benchmark: Bellman-Ford on a {size}x{size} grid with weights between -5 and 10')
+    grid = Graph[int](directed=True, capacity=size * size)
+    grid.add_vertices(random.sample(range(size * size), size * size))
+    grid.add_edges([(v, v + 1, random.randint(-5, 10)) for v in range(size * size) if v % size < size - 1] +
+                   [(v, v + size, random.randint(-5, 10)) for v in range(size * size - size)])
+    frozen_graph = grid.freeze()
+    for name, search in (('bellman_ford()', _bellman_ford.bellman_ford), ('spfa()', _bellman_ford.spfa),
+                         ('vectorized_bellman_ford()', vectorized_bellman_ford)):
+        start = time.perf_counter()
+        search(frozen_graph, 0)
+        print(f'  {name + ":":<27} {time.perf_counter() - start:.2f}s')
+
+    for n in (200, 1000, 2000):
+        print(f'Benchmark: Floyd-Warshall on a random graph with {n} vertices and {4 * n} edges')
+        random_graph = Graph[int](directed=True, capacity=n)
+        random_graph.add_vertices(range(n))
+        random_graph.add_edges((random.randrange(n), random.randrange(n), random.randint(1, 100))
+                               for _ in range(4 * n))
+        frozen_graph = random_graph.freeze()
+        engines = [('NumPy', _floyd_warshall_numpy)] + ([('pure Python', _floyd_warshall_python)] if n <= 200 else [])
+        for name, engine in engines:
+            start = time.perf_counter()
+            engine(frozen_graph)
+            print(f'  {name + ":":<12} {time.perf_counter() - start:.2f}s')
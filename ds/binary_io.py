@@ -0,0 +1,58 @@
+import itertools
+import sys
+from array import array
+
+# Helpers shared by the binary file formats of `FrozenGraph` and `ContractionHierarchy`: packed arrays of 64 bit
+# integers or floats, stored little-endian whatever the byte order of the machine, and lists of `int` or `str` vertices
+
+# How a list of vertices is stored, as recorded in a file header
+INT_VERTICES = 0
+STR_VERTICES = 1
+
+
+def vertex_kind(vertices: list) -> int:
+    """
+    :return: `INT_VERTICES` or `STR_VERTICES`
+    :raises TypeError: If the vertices are not all `int`s or all `str`s.
+    """
+    if all(type(v) is int for v in vertices):
+        return INT_VERTICES
+    if all(type(v) is str for v in vertices):
+        return STR_VERTICES
+    raise TypeError('Only graphs whose vertices are all ints or all strs can be saved.')
+
+
+def write_vertices(file, vertices: list, kind: int):
+    """
+    Write `int` vertices as an array, or `str` vertices as an array of the end offsets of their UTF-8 encodings followed
+    by the encodings themselves.
+    """
+    if kind == INT_VERTICES:
+        write_array(file, array('q', vertices))
+    else:
+        encoded = [v.encode() for v in vertices]
+        write_array(file, array('q', itertools.accumulate(map(len, encoded))))
+        file.write(b''.join(encoded))
+
+
+def read_vertices(file, kind: int, count: int) -> list:
+    if kind == INT_VERTICES:
+        return read_array(file, 'q', count).tolist()
+    ends = read_array(file, 'q', count)
+    encoded = file.read(ends[-1] if count else 0)
+    return [encoded[start:end].decode() for start, end in zip([0, *ends], ends)]
+
+
+def write_array(file, values: array):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(file)
+
+
+def read_array(file, typecode: str, count: int) -> array:
+    values = array(typecode)
+    values.fromfile(file, count)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
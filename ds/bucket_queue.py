@@ -0,0 +1,127 @@
+import random
+import time
+
+from ds.heap import IndexedMinHeap
+
+
+class BucketQueue[T]:
+    """
+    Dial's bucket queue: a min priority queue for small non-negative integer priorities that never go below the last
+    popped priority, such as the distances in Dijkstra's algorithm with small integer edge weights.
+
+    Values are kept in a circular array of `max_spread + 1` buckets, one per priority, indexed by the priority modulo
+    the number of buckets. This works as long as every priority in the queue is within `max_spread` of the smallest
+    one, which holds for Dijkstra's algorithm when `max_spread` is the largest edge weight. Popping scans forward from
+    the last popped priority to the first non-empty bucket, and nothing is ever compared.
+
+    Each bucket is a dict used as an ordered set, so values must be hashable and unique, as with `IndexedMinHeap`.
+
+    Time Complexities:
+        - Insert: `O(1)`
+        - Decrease/increase key: `O(1)`
+        - Delete/remove min: `O(1)` amortized over the priorities scanned, which is at most `O(max_spread)` per pop
+    """
+    def __init__(self, max_spread: int):
+        """
+        :param max_spread: The largest difference between two priorities in the queue at any one time.
+        """
+        if max_spread < 0:
+            raise ValueError('Bucket queue spread must be non-negative.')
+        self.buckets = [dict() for _ in range(max_spread + 1)]
+        self.priorities = {}
+        # No priority in the queue is lower than this
+        self.cursor = 0
+
+    def __contains__(self, item):
+        return item in self.priorities
+
+    def __str__(self):
+        return str(sorted(self.priorities.items(), key=lambda entry: entry[1]))
+
+    def _check_priority(self, priority: int):
+        if not self.cursor <= priority <= self.cursor + len(self.buckets) - 1:
+            raise ValueError(f'Priority {priority} is outside of the range [{self.cursor}, '
+                             f'{self.cursor + len(self.buckets) - 1}] the queue can hold.')
+
+    def push(self, value: T, priority: int = None):
+        if value in self.priorities:
+            raise ValueError(f'Value \'{value}\' already present in heap.')
+        priority = value if priority is None else priority
+        # An empty queue can start over anywhere, but should keep the last popped priority while it still fits, since
+        # later pushes may be lower than this one
+        if not self.priorities and not self.cursor <= priority < self.cursor + len(self.buckets):
+            self.cursor = priority
+        self._check_priority(priority)
+        self.buckets[priority % len(self.buckets)][value] = None
+        self.priorities[value] = priority
+
+    def _advance(self) -> dict:
+        """
+        Move the cursor to the lowest priority in the queue and return its bucket.
+        """
+        if not self.priorities:
+            raise IndexError('Heap is empty')
+        buckets = self.buckets
+        cursor = self.cursor
+        while not buckets[cursor % len(buckets)]:
+            cursor += 1
+        self.cursor = cursor
+        return buckets[cursor % len(buckets)]
+
+    def pop(self) -> T:
+        value, _ = self._advance().popitem()
+        del self.priorities[value]
+        return value
+
+    def peek(self) -> T:
+        return next(iter(self._advance()))
+
+    def update_value(self, value: T, new_priority: int):
+        old_priority = self.priorities.get(value)
+        if old_priority is None:
+            raise ValueError(f'Value \'{value}\' not found in heap.')
+        self._check_priority(new_priority)
+        del self.buckets[old_priority % len(self.buckets)][value]
+        self.buckets[new_priority % len(self.buckets)][value] = None
+        self.priorities[value] = new_priority
+
+    def size(self) -> int:
+        return len(self.priorities)
+
+    def is_empty(self) -> bool:
+        return not self.priorities
+
+
+if __name__ == '__main__':
+    queue = BucketQueue[str](max_spread=10)
+    queue.push('A', 3)
+    queue.push('B', 7)
+    queue.push('C', 5)
+    queue.update_value('B', 4)
+    print('Queue: ', queue)
+    print('Popped: ', [queue.pop() for _ in range(queue.size())])
+    queue.push('D', 20)
+    try:
+        queue.push('E', 40)
+    except ValueError as e:
+        print('Caught ValueError: ', e)
+
+    print()
+
+    # Simulate the access pattern of Dijkstra's algorithm: every push is within `spread` of the last popped priority
+    n = 200_000
+    spread = 100
+    print(f'Benchmark: {n} monotone pushes and pops with priorities spread over {spread}')
+    operations = [random.randint(0, spread) for _ in range(n)]
+    for queue_type in (BucketQueue, IndexedMinHeap):
+        queue = BucketQueue(spread) if queue_type is BucketQueue else IndexedMinHeap()
+        start = time.perf_counter()
+        last = 0
+        for i, offset in enumerate(operations):
+            queue.push(i, last + offset)
+            if i % 2:
+                last = queue.priorities[queue.peek()] if queue_type is BucketQueue else queue.heap[0][1]
+                queue.pop()
+        while not queue.is_empty():
+            queue.pop()
+        print(f'  {queue_type.__name__}: {time.perf_counter() - start:.2f}s')
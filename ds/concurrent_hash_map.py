@@ -0,0 +1,186 @@
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterable, Tuple
+
+from ds.hash_map import HashMap
+
+
+class ConcurrentHashMap:
+    """
+    A thread-safe HashMap that shards its keys across a fixed number of independently locked segments (lock striping).
+
+    Each segment is a regular `HashMap` with its own lock, so threads working on keys in different segments never wait
+    on each other, and a segment that needs to resize only blocks the keys in that segment while it does. Reads take
+    the segment lock as well: the HashMap's arrays are briefly inconsistent in the middle of an insert, delete or resize,
+    and without the GIL (free-threaded CPython) an unlocked read could observe that.
+
+    Operations that span every segment (`keys()`, `items()`, `num_entries`, iteration) lock one segment at a time, so
+    they are not a consistent snapshot of the whole map if other threads are writing concurrently.
+    """
+    def __init__(self, segments: int = 16, capacity: int = 0):
+        """
+        :param segments: The number of independently locked segments. More segments means less lock contention
+            between threads, at the cost of some memory for each segment.
+        :param capacity: The total number of entries to make room for up front.
+        """
+        if segments < 1:
+            raise ValueError('A ConcurrentHashMap needs at least one segment.')
+        self._segments = [HashMap(capacity=-(-capacity // segments)) for _ in range(segments)]
+        self._locks = [threading.Lock() for _ in range(segments)]
+
+    def __contains__(self, key) -> bool:
+        segment = self._segment_of(key)
+        with self._locks[segment]:
+            return key in self._segments[segment]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, key):
+        segment = self._segment_of(key)
+        with self._locks[segment]:
+            return self._segments[segment][key]
+
+    def __setitem__(self, key, value):
+        segment = self._segment_of(key)
+        with self._locks[segment]:
+            self._segments[segment][key] = value
+
+    def __delitem__(self, key):
+        segment = self._segment_of(key)
+        with self._locks[segment]:
+            del self._segments[segment][key]
+
+    def __str__(self):
+        return '\n'.join([f'{k}\t|\t{v}' for k, v in self.items()]) + '\n'
+
+    def _segment_of(self, key) -> int:
+        return hash(key) % len(self._segments)
+
+    def get(self, key, default=None):
+        segment = self._segment_of(key)
+        with self._locks[segment]:
+            hash_map = self._segments[segment]
+            return hash_map[key] if key in hash_map else default
+
+    def get_or_set(self, key, default):
+        """
+        Atomically return the value of `key`, first setting it to `default` if `key` is not in the map.
+        """
+        segment = self._segment_of(key)
+        with self._locks[segment]:
+            hash_map = self._segments[segment]
+            if key not in hash_map:
+                hash_map[key] = default
+                return default
+            return hash_map[key]
+
+    def compute(self, key, func: Callable[[Any, Any], Any]):
+        """
+        Atomically replace the value of `key` with `func(key, current_value)`, where `current_value` is `None` if `key`
+        is not in the map. If `func` returns `None`, `key` is removed from the map instead.
+
+        `func` runs while the segment is locked, so it should be quick and must not access this map itself.
+        :return: The new value of `key`
+        """
+        segment = self._segment_of(key)
+        with self._locks[segment]:
+            hash_map = self._segments[segment]
+            present = key in hash_map
+            value = func(key, hash_map[key] if present else None)
+            if value is not None:
+                hash_map[key] = value
+            elif present:
+                del hash_map[key]
+            return value
+
+    def update(self, items: Iterable[Tuple[Any, Any]]):
+        """
+        Insert or overwrite every `(key, value)` pair in `items`, locking each segment only once.
+        """
+        items = items.items() if hasattr(items, 'items') else items
+        batches = [[] for _ in self._segments]
+        for key, value in items:
+            batches[self._segment_of(key)].append((key, value))
+        for segment, batch in enumerate(batches):
+            if batch:
+                with self._locks[segment]:
+                    self._segments[segment].update(batch)
+
+    @property
+    def num_entries(self) -> int:
+        total = 0
+        for lock, hash_map in zip(self._locks, self._segments):
+            with lock:
+                total += hash_map.num_entries
+        return total
+
+    def keys(self) -> [Any]:
+        keys = []
+        for lock, hash_map in zip(self._locks, self._segments):
+            with lock:
+                keys.extend(hash_map.keys())
+        return keys
+
+    def items(self) -> [Tuple[Any, Any]]:
+        items = []
+        for lock, hash_map in zip(self._locks, self._segments):
+            with lock:
+                items.extend(hash_map.items())
+        return items
+
+
+if __name__ == '__main__':
+    cmap = ConcurrentHashMap(segments=4)
+    cmap['a'] = 1
+    cmap.update([('b', 2), ('c', 3)])
+    print('HashMap:\n', cmap)
+    print('get_or_set(d): ', cmap.get_or_set('d', 4))
+    print('get_or_set(a): ', cmap.get_or_set('a', 100))
+
+    # Count concurrently: compute() makes the read-modify-write atomic
+    counters = ConcurrentHashMap()
+
+    def count(n: int):
+        for i in range(n):
+            counters.compute(i % 10, lambda _, current: (current or 0) + 1)
+
+    threads = [threading.Thread(target=count, args=(10_000,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print('Counts: ', sorted(counters.items()))
+
+    print()
+
+    # Free-threaded builds of CPython (e.g. python3.13t) can run the threads below in parallel
+    gil_enabled = sys._is_gil_enabled() if hasattr(sys, '_is_gil_enabled') else True
+    ops_per_thread = 100_000
+    key_space = 100_000
+    print(f'Benchmark: {ops_per_thread} operations per thread, 80% reads, GIL enabled: {gil_enabled}')
+
+    def run_worker(shared_map: ConcurrentHashMap, seed: int):
+        rng = random.Random(seed)
+        for _ in range(ops_per_thread):
+            key = rng.randrange(key_space)
+            if rng.random() < 0.8:
+                shared_map.get(key)
+            else:
+                shared_map[key] = key
+
+    for segments in (1, 16):
+        for thread_count in (1, 2, 4, 8):
+            shared_map = ConcurrentHashMap(segments=segments)
+            shared_map.update((k, k) for k in range(0, key_space, 2))
+            threads = [threading.Thread(target=run_worker, args=(shared_map, seed)) for seed in range(thread_count)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            print(f'  {segments} segment(s), {thread_count} thread(s): '
+                  f'{thread_count * ops_per_thread / elapsed:,.0f} ops/s')
@@ -0,0 +1,232 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Iterable
+
+from ds.heap import MinHeap
+
+
+class ConcurrentMinHeap[T]:
+    """
+    A thread-safe wrapper around `MinHeap` for use as a priority queue shared between threads.
+
+    Every operation holds a single lock for its duration. Consumers that `pop()` from an empty heap wait on a condition
+    variable until a producer pushes a value (or until their timeout expires) instead of polling. `push_many()` and
+    `pop_many()` move a whole batch of values under one acquisition of the lock, which amortizes the locking overhead
+    when there are many producers and consumers contending for the heap.
+    """
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        self._heap = MinHeap[T](key=key, arity=arity)
+        self._not_empty = threading.Condition(threading.Lock())
+
+    def __str__(self):
+        with self._not_empty:
+            return str(self._heap)
+
+    def _wait_for_values(self, block: bool, timeout: float | None):
+        if not self._not_empty.wait_for(lambda: not self._heap.is_empty(), timeout if block else 0):
+            raise IndexError('Heap is empty')
+
+    def push(self, value: T, priority: int|float|str = None):
+        with self._not_empty:
+            self._heap.push(value, priority)
+            self._not_empty.notify()
+
+    def push_many(self, values: Iterable[T], priorities: Iterable[int|float|str] = None):
+        """
+        Push several values while only acquiring the lock once.
+        :param values: The values to push.
+        :param priorities: The priorities of `values`, in the same order. Defaults to the values themselves.
+        """
+        entries = [(value, None) for value in values] if priorities is None \
+            else list(zip(values, priorities, strict=True))
+        with self._not_empty:
+            for value, priority in entries:
+                self._heap.push(value, priority)
+            self._not_empty.notify(len(entries))
+
+    def pop(self, block: bool = True, timeout: float | None = None) -> T:
+        """
+        Remove and return the smallest value in the heap.
+        :param block: Whether to wait for a value to be pushed if the heap is empty.
+        :param timeout: The maximum number of seconds to wait. Waits indefinitely if `None`.
+        :raises IndexError: If the heap is still empty once done waiting.
+        """
+        with self._not_empty:
+            self._wait_for_values(block, timeout)
+            return self._heap.pop()
+
+    def pop_many(self, count: int, block: bool = True, timeout: float | None = None) -> [T]:
+        """
+        Remove and return up to `count` of the smallest values in the heap, smallest first, while only acquiring the
+        lock once. Only waits until there is at least one value to return.
+        :raises IndexError: If the heap is still empty once done waiting.
+        """
+        with self._not_empty:
+            self._wait_for_values(block, timeout)
+            return [self._heap.pop() for _ in range(min(count, self._heap.size()))]
+
+    def peek(self) -> T:
+        with self._not_empty:
+            return self._heap.peek()
+
+    def size(self) -> int:
+        with self._not_empty:
+            return self._heap.size()
+
+    def is_empty(self) -> bool:
+        with self._not_empty:
+            return self._heap.is_empty()
+
+
+class AsyncMinHeap[T]:
+    """
+    A `MinHeap` based priority queue for coroutines running in a single asyncio event loop.
+
+    `get()` suspends the calling coroutine until a value is available rather than raising on an empty heap. As with
+    `ConcurrentMinHeap`, `push_many()` and `pop_many()` handle whole batches under one acquisition of the condition's
+    lock. This is not thread-safe; use `ConcurrentMinHeap` to share a heap between threads.
+    """
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        self._heap = MinHeap[T](key=key, arity=arity)
+        self._not_empty = asyncio.Condition()
+
+    def __str__(self):
+        return str(self._heap)
+
+    async def put(self, value: T, priority: int|float|str = None):
+        async with self._not_empty:
+            self._heap.push(value, priority)
+            self._not_empty.notify()
+
+    async def push_many(self, values: Iterable[T], priorities: Iterable[int|float|str] = None):
+        entries = [(value, None) for value in values] if priorities is None \
+            else list(zip(values, priorities, strict=True))
+        async with self._not_empty:
+            for value, priority in entries:
+                self._heap.push(value, priority)
+            self._not_empty.notify(len(entries))
+
+    async def get(self) -> T:
+        async with self._not_empty:
+            await self._not_empty.wait_for(lambda: not self._heap.is_empty())
+            return self._heap.pop()
+
+    async def pop_many(self, count: int) -> [T]:
+        """
+        Remove and return up to `count` of the smallest values in the heap, smallest first. Only waits until there is
+        at least one value to return.
+        """
+        async with self._not_empty:
+            await self._not_empty.wait_for(lambda: not self._heap.is_empty())
+            return [self._heap.pop() for _ in range(min(count, self._heap.size()))]
+
+    def peek(self) -> T:
+        return self._heap.peek()
+
+    def size(self) -> int:
+        return self._heap.size()
+
+    def is_empty(self) -> bool:
+        return self._heap.is_empty()
+
+
+if __name__ == '__main__':
+    heap = ConcurrentMinHeap()
+    heap.push_many([5, 3, 8, 1])
+    print('Popped: ', heap.pop_many(3))
+    print('Popped: ', heap.pop())
+    try:
+        heap.pop(timeout=0.1)
+    except IndexError as e:
+        print('Caught IndexError: ', e)
+
+    async def async_demo():
+        async_heap = AsyncMinHeap()
+        consumer = asyncio.create_task(async_heap.get())
+        await async_heap.put('A', 2)
+        print('Got: ', await consumer)
+        await async_heap.push_many(['B', 'C', 'D'], [3, 1, 2])
+        print('Got: ', await async_heap.pop_many(3))
+
+    asyncio.run(async_demo())
+
+    print()
+
+    # Sentinels have the highest possible priority, so they are only popped once every real value has been consumed
+    sentinel = None
+    sentinel_priority = float('inf')
+    values_per_producer = 20_480
+
+    def run_consumer(shared_heap: ConcurrentMinHeap, batch_size: int):
+        while True:
+            batch = shared_heap.pop_many(batch_size) if batch_size > 1 else [shared_heap.pop()]
+            sentinels = batch.count(sentinel)
+            if sentinels > 0:
+                # Hand any extra sentinels back to the other consumers
+                shared_heap.push_many([sentinel] * (sentinels - 1), [sentinel_priority] * (sentinels - 1))
+                return
+
+    def run_producer(shared_heap: ConcurrentMinHeap, batch_size: int):
+        for _ in range(0, values_per_producer, batch_size):
+            if batch_size > 1:
+                shared_heap.push_many([random.random() for _ in range(batch_size)])
+            else:
+                shared_heap.push(random.random())
+
+    print(f'Benchmark: ConcurrentMinHeap, {values_per_producer} values per producer thread')
+    for producers, consumers in ((1, 1), (4, 4), (8, 2), (2, 8)):
+        for batch_size in (1, 64):
+            shared_heap = ConcurrentMinHeap()
+            producer_threads = [threading.Thread(target=run_producer, args=(shared_heap, batch_size))
+                                for _ in range(producers)]
+            consumer_threads = [threading.Thread(target=run_consumer, args=(shared_heap, batch_size))
+                                for _ in range(consumers)]
+            start = time.perf_counter()
+            for thread in producer_threads + consumer_threads:
+                thread.start()
+            for thread in producer_threads:
+                thread.join()
+            shared_heap.push_many([sentinel] * consumers, [sentinel_priority] * consumers)
+            for thread in consumer_threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            total = producers * values_per_producer
+            print(f'  {producers} producers, {consumers} consumers, batch size {batch_size}: '
+                  f'{elapsed:.2f}s ({total / elapsed:,.0f} values/s)')
+
+    async def async_benchmark(producers: int, consumers: int, batch_size: int) -> float:
+        shared_heap = AsyncMinHeap()
+
+        async def consume():
+            while True:
+                batch = await shared_heap.pop_many(batch_size) if batch_size > 1 else [await shared_heap.get()]
+                sentinels = batch.count(sentinel)
+                if sentinels > 0:
+                    await shared_heap.push_many([sentinel] * (sentinels - 1), [sentinel_priority] * (sentinels - 1))
+                    return
+
+        async def produce():
+            for _ in range(0, values_per_producer, batch_size):
+                if batch_size > 1:
+                    await shared_heap.push_many([random.random() for _ in range(batch_size)])
+                else:
+                    await shared_heap.put(random.random())
+                # Yield to the event loop so consumers interleave with producers
+                await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        consumer_tasks = [asyncio.create_task(consume()) for _ in range(consumers)]
+        await asyncio.gather(*[produce() for _ in range(producers)])
+        await shared_heap.push_many([sentinel] * consumers, [sentinel_priority] * consumers)
+        await asyncio.gather(*consumer_tasks)
+        return time.perf_counter() - start
+
+    print(f'Benchmark: AsyncMinHeap, {values_per_producer} values per producer task')
+    for producers, consumers in ((1, 1), (4, 4), (8, 2), (2, 8)):
+        for batch_size in (1, 64):
+            elapsed = asyncio.run(async_benchmark(producers, consumers, batch_size))
+            total = producers * values_per_producer
+            print(f'  {producers} producers, {consumers} consumers, batch size {batch_size}: '
+                  f'{elapsed:.2f}s ({total / elapsed:,.0f} values/s)')
@@ -8,14 +8,20 @@ class DisjointSet[T]:
     With the above-mentioned optimizations, find() and union() have a runtime of O(a(n))
     where a(n) is the inverse Ackermann function. For practical purposes, we can treat this O(1)
     """
-    def __init__(self):
-        self._parent = HashMap()
-        self._rank = HashMap()
+    def __init__(self, track_stats: bool = False):
+        self._parent = HashMap(track_stats=track_stats)
+        self._rank = HashMap(track_stats=track_stats)
 
     def make_set(self, nums: list[T]):
-        for n in nums:
-            self._parent[n] = n
-            self._rank[n] = 0
+        nums = list(nums)
+        self._parent.update((n, n) for n in nums)
+        self._rank.update((n, 0) for n in nums)
+
+    def stats(self) -> dict:
+        """
+        Get the `HashMap.stats()` snapshots of the hash tables holding each element's parent and rank.
+        """
+        return {'parent': self._parent.stats(), 'rank': self._rank.stats()}
 
     def find(self, n: T):
         if n not in self._parent:
@@ -0,0 +1,267 @@
+import contextlib
+import hashlib
+import mmap
+import os
+import random
+import struct
+import tempfile
+import time
+from typing import Any, Iterable, Iterator, Tuple
+
+from ds.hash_map import HashMap
+
+
+class DiskHashMap:
+    """
+    A persistent, read-only hash map stored in a file and accessed through `mmap`, for lookup tables that are too large
+    to load into memory (or too slow to rebuild on every start up).
+
+    It uses the same open addressing design as `HashMap`: a power-of-two array of slots, Fibonacci hashing and
+    Robin Hood linear probing, sized to stay under the same 75% load factor. Every slot has a fixed width, so the slot
+    for a position is found with a multiplication and read straight out of the mapped file. Opening a map only reads
+    its header, and a lookup only touches the pages of the slots it probes; the operating system pages them in on
+    demand and can drop them again under memory pressure.
+
+    Each slot holds a one byte tag (zero for an empty slot), the key's 64 bit hash, the key and the value. Keys are
+    either 64 bit signed integers or byte strings of up to `key_size` bytes, and values are 64 bit signed integers,
+    such as offsets into another file. Byte string hashes come from BLAKE2 rather than `hash()`, which is randomized
+    for every Python process.
+
+    Maps are written once with `build()` and then opened any number of times for reading.
+    """
+    _MAGIC = b'DSAHMAP1'
+    _HEADER = struct.Struct('<8sBxxxIQQ')
+    _INT_KEYS = 0
+    _BYTES_KEYS = 1
+    _MAX_KEY_SIZE = 254
+
+    def __init__(self, path: str):
+        """
+        Open the map stored at `path` for reading.
+        :raises ValueError: If `path` does not contain a map written by `build()`.
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            # An empty file cannot be mapped
+            self._file.close()
+            raise
+        magic, key_kind, key_size, capacity, num_entries = self._HEADER.unpack_from(self._mmap, 0)
+        if magic != self._MAGIC:
+            self.close()
+            raise ValueError(f'\'{path}\' is not a DiskHashMap file.')
+        self._configure(key_kind, key_size, capacity)
+        self.num_entries = num_entries
+
+    def __enter__(self) -> 'DiskHashMap':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.num_entries
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) is not None
+
+    def __getitem__(self, key) -> int:
+        value = self._find(key)
+        if value is None:
+            raise KeyError(str(key))
+        return value
+
+    def __iter__(self) -> Iterator:
+        return (key for key, _ in self.items())
+
+    @classmethod
+    def build(cls, path: str, items: Iterable[Tuple[Any, int]], key_type: type = int, key_size: int = 8,
+              capacity: int = None) -> 'DiskHashMap':
+        """
+        Write a map holding `items` to `path` and open it.
+
+        The file is sized once up front and the items are inserted straight into the mapped file, so building never
+        holds the whole table in memory either.
+        :param path: The file to write. Any existing file is replaced once the new map is complete, and left as it was
+            if building fails.
+        :param items: The `(key, value)` pairs to store. Later pairs overwrite earlier ones with the same key.
+        :param key_type: Either `int` or `bytes`.
+        :param key_size: The maximum length of `bytes` keys. Ignored for `int` keys.
+        :param capacity: The number of distinct keys to make room for. Defaults to `len(items)`.
+        :raises ValueError: If there are more distinct keys than `capacity` or a key does not fit in its slot.
+        """
+        if key_type is int:
+            key_kind, key_size = cls._INT_KEYS, 8
+        elif key_type is bytes:
+            if not 0 < key_size <= cls._MAX_KEY_SIZE:
+                raise ValueError(f'Key size must be between 1 and {cls._MAX_KEY_SIZE} bytes.')
+            key_kind = cls._BYTES_KEYS
+        else:
+            raise TypeError('Keys must be of type int or bytes.')
+        if capacity is None:
+            items = items if hasattr(items, '__len__') else list(items)
+            capacity = len(items)
+
+        # Sized so that `capacity` keys stay under the load factor
+        table_size = HashMap._capacity_for(capacity)
+        builder = cls.__new__(cls)
+        builder._configure(key_kind, key_size, table_size)
+
+        # Build into a temporary file next to `path` and only move it into place once it is complete, so that a failed
+        # build neither leaves a truncated map behind nor destroys an existing one
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'w+b') as file:
+                file_size = cls._HEADER.size + table_size * builder._slot.size
+                file.truncate(file_size)
+                with mmap.mmap(file.fileno(), file_size) as builder._mmap:
+                    num_entries = 0
+                    for key, value in items:
+                        if builder._insert(key, value):
+                            num_entries += 1
+                            if num_entries > capacity:
+                                raise ValueError(f'More than {capacity} distinct keys were given.')
+                    cls._HEADER.pack_into(builder._mmap, 0, cls._MAGIC, key_kind, key_size, table_size, num_entries)
+                    builder._mmap.flush()
+            os.replace(temp_path, path)
+        except BaseException:
+            # The temporary file does not exist if it could not be created
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temp_path)
+            raise
+
+        return cls(path)
+
+    def _configure(self, key_kind: int, key_size: int, capacity: int):
+        self._key_kind = key_kind
+        self._key_size = key_size
+        self._slot = struct.Struct('<BQqq' if key_kind == self._INT_KEYS else f'<BQ{key_size}sq')
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._hash_shift = 64 - (capacity.bit_length() - 1)
+
+    def _encode(self, key) -> (int, int, Any):
+        """
+        Get the tag, the hash and the stored form of `key`.
+        """
+        if self._key_kind == self._INT_KEYS:
+            if not isinstance(key, int):
+                raise TypeError('Keys must be of type int.')
+            hash_val = hash(key)
+            return 1, (hash_val * HashMap._HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF, key
+
+        if not isinstance(key, bytes):
+            raise TypeError('Keys must be of type bytes.')
+        if len(key) > self._key_size:
+            raise ValueError(f'Key is longer than {self._key_size} bytes.')
+        hash_val = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+        # The tag doubles as the key length, so keys ending in null bytes can be told apart from their padding
+        return len(key) + 1, (hash_val * HashMap._HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF, \
+            key.ljust(self._key_size, b'\0')
+
+    def _offset(self, pos: int) -> int:
+        return self._HEADER.size + pos * self._slot.size
+
+    def _find(self, key) -> int | None:
+        """
+        Find the value of `key`.
+        :return: The value of `key`, or `None` if it is not in the map
+        """
+        tag, hash_val, stored_key = self._encode(key)
+        pos = hash_val >> self._hash_shift
+        distance = 0
+        while True:
+            entry_tag, entry_hash, entry_key, value = self._slot.unpack_from(self._mmap, self._offset(pos))
+            if entry_tag == 0:
+                return None
+            if entry_hash == hash_val and entry_tag == tag and entry_key == stored_key:
+                return value
+            # Had the key been inserted, it would have displaced this entry
+            if (pos - (entry_hash >> self._hash_shift)) & self._mask < distance:
+                return None
+            pos = (pos + 1) & self._mask
+            distance += 1
+
+    def _insert(self, key, value: int) -> bool:
+        """
+        Insert or overwrite `key` while building the map.
+        :return: Whether `key` is a new entry
+        """
+        entry = (*self._encode(key), value)
+        pos = entry[1] >> self._hash_shift
+        distance = 0
+        while True:
+            offset = self._offset(pos)
+            resident = self._slot.unpack_from(self._mmap, offset)
+            if resident[0] == 0:
+                self._slot.pack_into(self._mmap, offset, *entry)
+                return True
+            # An existing key is always found before the entry being inserted has displaced anything
+            if resident[:3] == entry[:3]:
+                self._slot.pack_into(self._mmap, offset, *entry)
+                return False
+            resident_distance = (pos - (resident[1] >> self._hash_shift)) & self._mask
+            if resident_distance < distance:
+                self._slot.pack_into(self._mmap, offset, *entry)
+                entry = resident
+                distance = resident_distance
+            pos = (pos + 1) & self._mask
+            distance += 1
+
+    def get(self, key, default: int = None) -> int | None:
+        value = self._find(key)
+        return default if value is None else value
+
+    def items(self) -> Iterator[Tuple[Any, int]]:
+        """
+        Iterate over every `(key, value)` pair by scanning the whole file.
+        """
+        for pos in range(self._capacity):
+            tag, _, key, value = self._slot.unpack_from(self._mmap, self._offset(pos))
+            if tag == 0:
+                continue
+            yield (key if self._key_kind == self._INT_KEYS else key[:tag - 1]), value
+
+    def keys(self) -> [Any]:
+        return [key for key, _ in self.items()]
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'names.dhm')
+        with DiskHashMap.build(path, [(b'apple', 1), (b'banana', 2), (b'cherry', 3)], key_type=bytes,
+                               key_size=16) as dmap:
+            print('Items: ', list(dmap.items()))
+            print('banana: ', dmap[b'banana'])
+            print('Is durian in map: ', b'durian' in dmap)
+
+        n = 500_000
+        lookups = 200_000
+        print(f'Benchmark: {n} integer keys, {lookups} random lookups')
+        path = os.path.join(directory, 'offsets.dhm')
+        pairs = [(random.getrandbits(63), offset * 64) for offset in range(n)]
+
+        start = time.perf_counter()
+        DiskHashMap.build(path, pairs).close()
+        print(f'  build DiskHashMap:   {time.perf_counter() - start:.2f}s ({os.path.getsize(path) / n:.1f} bytes/key)')
+        start = time.perf_counter()
+        in_memory = HashMap.from_items(pairs)
+        print(f'  build HashMap:       {time.perf_counter() - start:.2f}s')
+
+        start = time.perf_counter()
+        dmap = DiskHashMap(path)
+        print(f'  open DiskHashMap:    {(time.perf_counter() - start) * 1000:.3f}ms')
+
+        lookup_keys = [random.choice(pairs)[0] for _ in range(lookups)]
+        for lookup_map in (dmap, in_memory):
+            start = time.perf_counter()
+            for k in lookup_keys:
+                _ = lookup_map[k]
+            elapsed = time.perf_counter() - start
+            print(f'  lookups: {type(lookup_map).__name__} {lookups / elapsed:,.0f}/s')
+        dmap.close()
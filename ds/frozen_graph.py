@@ -0,0 +1,270 @@
+import os
+import random
+import struct
+import tempfile
+import time
+from array import array
+from typing import Any, Iterable, Iterator, Tuple
+
+from ds.binary_io import read_array, read_vertices, vertex_kind, write_array, write_vertices
+
+
+class FrozenGraph[T]:
+    """
+    An immutable snapshot of a `Graph` in compressed sparse row (CSR) form, for algorithms that only read the graph.
+
+    Every vertex is interned to an integer id (its position in `vertices`), and the adjacency lists of all vertices are
+    laid out back to back in two flat arrays:
+        - `targets[offsets[i]:offsets[i + 1]]` holds the ids of the neighbors of vertex `i`.
+        - `weights[offsets[i]:offsets[i + 1]]` holds the weights of the edges to those neighbors, in the same order.
+    As with `Graph`, an undirected edge appears in the adjacency lists of both of its vertices.
+
+    The arrays are packed `array`s of machine integers (or floats), so the whole graph takes a few bytes per edge
+    instead of a dict entry and tuple per edge. Algorithms can walk a vertex's neighbors by indexing the arrays over
+    `neighbor_range(i)` without allocating anything per neighbor. If any weight is neither an `int` nor a `float`
+    (e.g. unweighted edges with a weight of `None`), or an integer does not fit in 64 bits, the weights are kept in a
+    plain list instead.
+
+    The snapshot does not change when the graph it was taken from is mutated.
+
+    Since the snapshot is already a handful of flat arrays, `save()` writes them to a binary file more or less as they
+    are laid out in memory, and `load()` reads them straight back without parsing anything, so a large graph can be
+    reopened at start up far faster than it can be rebuilt from a text edge list.
+
+    Time Complexities:
+        - Retrieve neighbors of node X: `O(e)` where `e` is the number of neighbors of `x`
+        - Check if nodes `x`, and `y` are adjacent: `O(e)` where `e` is the number of neighbors of `x`
+        - Get all edges: `O(1)` after the first call, which caches them
+    """
+    _MAGIC = b'DSAGRPH1'
+    _HEADER = struct.Struct('<8sBBBxxxxxQQ')
+    _INT_WEIGHTS = 0
+    _FLOAT_WEIGHTS = 1
+    _NO_WEIGHTS = 2
+
+    def __init__(self, adjacency: Iterable[Tuple[T, dict[T, Any]]], directed: bool = False):
+        """
+        :param adjacency: Pairs of each vertex and a dict mapping its neighbors to the weights of the edges to them.
+        :param directed: Whether the edges are directed.
+        """
+        adjacency = list(adjacency)
+        self.vertices = [vertex for vertex, _ in adjacency]
+        self._ids = {vertex: i for i, vertex in enumerate(self.vertices)}
+        self._directed = directed
+
+        self.offsets = array('q', [0])
+        self.targets = array('q')
+        weights = []
+        for _, neighbors in adjacency:
+            for neighbor, weight in neighbors.items():
+                self.targets.append(self._ids[neighbor])
+                weights.append(weight)
+            self.offsets.append(len(self.targets))
+
+        self.weights = weights
+        try:
+            if all(type(w) is int for w in weights):
+                self.weights = array('q', weights)
+            elif all(type(w) in (int, float) for w in weights):
+                self.weights = array('d', weights)
+        except OverflowError:
+            # Python ints have no fixed size, so some weights a Graph accepts do not fit in a machine word
+            pass
+
+        self._edges = None
+
+    def __contains__(self, item):
+        return item in self._ids
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def __str__(self):
+        return '\n'.join([f'{v}\t|\t{dict(self.iter_neighbors(v))}' for v in self.vertices]) + '\n'
+
+    @property
+    def directed(self) -> bool:
+        return self._directed
+
+    def vertex_id(self, value: T) -> int:
+        """
+        Get the integer id of the vertex `value`, which is its position in `vertices`.
+        """
+        try:
+            return self._ids[value]
+        except KeyError:
+            raise KeyError(f'Value \'{value}\' not present in graph.') from None
+
+    def neighbor_range(self, vertex_id: int) -> range:
+        """
+        Get the positions in `targets` and `weights` of the edges leaving the vertex with id `vertex_id`.
+        """
+        return range(self.offsets[vertex_id], self.offsets[vertex_id + 1])
+
+    def iter_neighbors(self, value: T) -> Iterator[Tuple[T, Any]]:
+        """
+        Iterate over the neighbors (node, weight) of the node `value` without building a list.
+        """
+        vertices, targets, weights = self.vertices, self.targets, self.weights
+        for pos in self.neighbor_range(self.vertex_id(value)):
+            yield vertices[targets[pos]], weights[pos]
+
+    def neighbors(self, value: T) -> [(T, int)]:
+        """
+        Get all the neighbors (node, weight) of the node `value`.
+        :param value: A value in the graph
+        :return: A list of tuples representing the neighbors of `value` and the weights of their edges
+        """
+        return list(self.iter_neighbors(value))
+
+    def is_adjacent(self, first: T, second: T) -> bool:
+        second_id = self.vertex_id(second)
+        return any(self.targets[pos] == second_id for pos in self.neighbor_range(self.vertex_id(first)))
+
+    def nodes(self) -> [T]:
+        return list(self.vertices)
+
+    @property
+    def edge_count(self) -> int:
+        """
+        The number of edges in the graph, counting each undirected edge once.
+        """
+        return len(self.targets) if self._directed else len(self.targets) // 2
+
+    def iter_edges(self) -> Iterator[Tuple[T, T, Any]]:
+        """
+        Iterate over the edges of the graph and their weights, in the same order as `edges()`.
+        """
+        vertices, targets, weights = self.vertices, self.targets, self.weights
+        for u in range(len(vertices)):
+            for pos in self.neighbor_range(u):
+                if self._directed or u < targets[pos]:
+                    yield vertices[u], vertices[targets[pos]], weights[pos]
+
+    def edges(self) -> [(T, T, int)]:
+        """
+        Get all the edges of the graph along with their corresponding weights.
+
+        Undirected graphs do not return duplicate edges: of the two directions of an edge, only the one leaving the
+        vertex with the lower id is returned. The edges are cached on the first call, since the graph cannot change.
+        :return: A list of tuples `(v1, v2, weight)` representing the edges of the graph and their weights
+        """
+        if self._edges is None:
+            self._edges = list(self.iter_edges())
+        # Callers such as kruskal() sort the list they get in place
+        return list(self._edges)
+
+    def save(self, path: str):
+        """
+        Write the snapshot to `path` in a compact binary format, to be reopened with `load()`.
+
+        The file holds a header followed by the `offsets`, `targets` and `weights` arrays and the vertices, as
+        little-endian 64 bit integers or floats. String vertices are stored as UTF-8 along with their end offsets.
+        :param path: The file to write. Any existing file is overwritten.
+        :raises TypeError: If the vertices are not all `int`s or all `str`s, or the weights are neither all 64 bit
+            numbers nor all `None`.
+        """
+        kind = vertex_kind(self.vertices)
+        if isinstance(self.weights, array):
+            weight_kind = self._INT_WEIGHTS if self.weights.typecode == 'q' else self._FLOAT_WEIGHTS
+        elif all(w is None for w in self.weights):
+            weight_kind = self._NO_WEIGHTS
+        else:
+            raise TypeError('Only graphs whose weights are all 64 bit numbers or all None can be saved.')
+
+        with open(path, 'wb') as file:
+            file.write(self._HEADER.pack(self._MAGIC, self._directed, kind, weight_kind, len(self.vertices),
+                                         len(self.targets)))
+            write_array(file, self.offsets)
+            write_array(file, self.targets)
+            if weight_kind != self._NO_WEIGHTS:
+                write_array(file, self.weights)
+            write_vertices(file, self.vertices, kind)
+
+    @classmethod
+    def load(cls, path: str) -> 'FrozenGraph':
+        """
+        Open a snapshot written by `save()`.
+
+        The arrays are read directly into memory, so loading costs little more than reading the file and interning the
+        vertices.
+        :raises ValueError: If `path` does not contain a snapshot written by `save()`.
+        """
+        with open(path, 'rb') as file:
+            header = file.read(cls._HEADER.size)
+            if len(header) < cls._HEADER.size or not header.startswith(cls._MAGIC):
+                raise ValueError(f'\'{path}\' is not a FrozenGraph file.')
+            _, directed, kind, weight_kind, num_vertices, num_targets = cls._HEADER.unpack(header)
+
+            graph = cls.__new__(cls)
+            graph._directed = bool(directed)
+            graph.offsets = read_array(file, 'q', num_vertices + 1)
+            graph.targets = read_array(file, 'q', num_targets)
+            if weight_kind == cls._NO_WEIGHTS:
+                graph.weights = [None] * num_targets
+            else:
+                graph.weights = read_array(file, 'q' if weight_kind == cls._INT_WEIGHTS else 'd', num_targets)
+            graph.vertices = read_vertices(file, kind, num_vertices)
+
+        graph._ids = {vertex: i for i, vertex in enumerate(graph.vertices)}
+        graph._edges = None
+        return graph
+
+
+if __name__ == '__main__':
+    from ds.graph import Graph
+
+    graph = Graph[str](directed=True)
+    for v in 'ABCD':
+        graph.add_vertex(v)
+    graph.add_edge('A', 'B', 1)
+    graph.add_edge('A', 'C', 4)
+    graph.add_edge('B', 'C', 2)
+    graph.add_edge('C', 'D', 3)
+    frozen = graph.freeze()
+    print(frozen)
+    print('Offsets: ', frozen.offsets)
+    print('Targets: ', frozen.targets)
+    print('Weights: ', frozen.weights)
+    print('Edges: ', frozen.edges())
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'graph.bin')
+        frozen.save(path)
+        print('Reloaded edges: ', FrozenGraph.load(path).edges())
+
+    print()
+
+    n = 100_000
+    m = 500_000
+    print(f'Benchmark: iterating over all neighbors of a graph with {n} vertices and {m} edges')
+    graph = Graph[int](directed=True, capacity=n)
+    for v in range(n):
+        graph.add_vertex(v)
+    for _ in range(m):
+        graph.add_edge(random.randrange(n), random.randrange(n), random.randint(1, 100))
+
+    start = time.perf_counter()
+    frozen = graph.freeze()
+    print(f'  freeze():                     {time.perf_counter() - start:.2f}s')
+
+    start = time.perf_counter()
+    total = 0
+    for v in graph.nodes():
+        for _, w in graph.neighbors(v):
+            total += w
+    print(f'  Graph.neighbors():            {time.perf_counter() - start:.2f}s')
+
+    start = time.perf_counter()
+    total = 0
+    for v in frozen.nodes():
+        for _, w in frozen.iter_neighbors(v):
+            total += w
+    print(f'  FrozenGraph.iter_neighbors(): {time.perf_counter() - start:.2f}s')
+
+    start = time.perf_counter()
+    total = 0
+    weights = frozen.weights
+    for i in range(len(frozen)):
+        for pos in frozen.neighbor_range(i):
+            total += weights[pos]
+    print(f'  FrozenGraph.neighbor_range(): {time.perf_counter() - start:.2f}s')
@@ -1,3 +1,13 @@
+import itertools
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from typing import Callable, Iterable, Iterator
+
+from ds.frozen_graph import FrozenGraph
 from ds.hash_map import HashMap
 
 
@@ -12,12 +22,45 @@ class Graph[T]:
         - Retrieve neighbors of node X
     The remaining operations have the following time complexities:
         - Check if nodes `x`, and `y` are adjacent: `O(e)` where `e` is the number of neighbors of `x`
-        - Remove vertex: `O(v * e)` where `v` is the number of vertices in the graph and `e` is the average number
-            of neighbors of each vertex
+        - Remove vertex: `O(e)` where `e` is the degree of the vertex for undirected graphs, and for directed graphs
+            tracking in-edges. Otherwise `O(v)` where `v` is the number of vertices in the graph, since every vertex
+            could have an edge to the removed one.
+
+    Directed graphs can optionally track in-edges: a second hash table maps each vertex to the vertices with an edge to
+    it. This makes removing a vertex and `in_neighbors()` proportional to the vertex's degree, at the cost of a second
+    hash table entry per vertex and a second dict entry per edge (roughly doubling the graph's memory use).
+
+    Dense graphs can use an adjacency matrix instead, with `Graph(backend='matrix')`, which creates a `MatrixGraph`.
     """
-    def __init__(self, directed=False):
-        self._adjacency_list = HashMap()
+    _BACKENDS = ('hash', 'matrix')
+
+    def __new__(cls, *args, backend: str = 'hash', **kwargs):
+        if backend not in cls._BACKENDS:
+            raise ValueError(f'Unknown graph backend \'{backend}\'. Expected one of {cls._BACKENDS}.')
+        if backend == 'matrix' and cls is Graph:
+            # Imported here, since ds.matrix_graph imports this module
+            from ds.matrix_graph import MatrixGraph
+            cls = MatrixGraph
+        return super().__new__(cls)
+
+    def __init__(self, directed=False, capacity: int = 0, track_stats: bool = False, track_in_edges: bool = False,
+                 *, backend: str = 'hash'):
+        """
+        :param directed: Whether edges only go from their start to their end vertex.
+        :param capacity: The number of vertices to make room for up front, so that adding that many vertices never has
+            to resize the underlying hash table.
+        :param track_stats: Whether the underlying hash table records probe lengths and resizes (see `stats()`).
+        :param track_in_edges: Whether a directed graph keeps an index of the edges into each vertex. Undirected
+            graphs don't need one, since every edge is stored in both directions.
+        :param backend: `'hash'` for a hash table of adjacency dicts, or `'matrix'` for a `MatrixGraph`.
+        """
+        self._adjacency_list = HashMap(capacity=capacity, track_stats=track_stats)
         self._directed = directed
+        self._in_adjacency_list = HashMap(capacity=capacity) if directed and track_in_edges else None
+        self._edge_count = 0
+        self._edge_cache = None
+        # Bumped on every change, so results computed from the graph can tell they are stale
+        self._version = 0
 
     def __contains__(self, item):
         return item in self._adjacency_list
@@ -25,6 +68,34 @@ class Graph[T]:
     def __str__(self):
         return str(self._adjacency_list)
 
+    @property
+    def directed(self) -> bool:
+        return self._directed
+
+    @property
+    def version(self) -> int:
+        """
+        A counter that changes whenever a vertex or edge is added or removed, for caches of results computed from the
+        graph (such as `alg.dijkstra.ShortestPathCache`) to check whether they are stale.
+        """
+        return self._version
+
+    @classmethod
+    def from_edge_list(cls, path: str, directed: bool = False, vertex_type: Callable[[str], T] = int,
+                       weight_type: Callable[[str], int|float] = int, batch_size: int = 100_000) -> 'Graph[T]':
+        """
+        Build a graph from a text file of edges, streaming it through `read_edge_list()` and `add_edges()` in batches
+        of `batch_size` edges, so the whole file is never held in memory as a list of edges.
+
+        Every vertex comes from an edge, so the file cannot describe isolated vertices. To avoid parsing the file on
+        every start up, `freeze()` the graph once and `save()` the snapshot, which `FrozenGraph.load()` reopens.
+        """
+        graph = cls(directed=directed)
+        edges = read_edge_list(path, vertex_type=vertex_type, weight_type=weight_type)
+        while batch := list(itertools.islice(edges, batch_size)):
+            graph.add_edges(batch, auto_create_vertices=True)
+        return graph
+
     @staticmethod
     def _validate(func):
         def wrapper(self, *args):
@@ -40,14 +111,48 @@ class Graph[T]:
     def add_vertex(self, value: T):
         if value not in self._adjacency_list:
             self._adjacency_list[value] = dict()
+            if self._in_adjacency_list is not None:
+                self._in_adjacency_list[value] = dict()
+            self._version += 1
+
+    def add_vertices(self, values: Iterable[T]):
+        """
+        Add several vertices at once, skipping any already in the graph.
+
+        The new vertices are inserted with a single `HashMap.update()`, which resizes the hash table at most once.
+        """
+        new_values = [value for value in dict.fromkeys(values) if value not in self._adjacency_list]
+        self._adjacency_list.update((value, dict()) for value in new_values)
+        if self._in_adjacency_list is not None:
+            self._in_adjacency_list.update((value, dict()) for value in new_values)
+        self._version += 1
 
     @_validate
     def remove_vertex(self, value: T):
+        out_neighbors = self._adjacency_list[value]
         del self._adjacency_list[value]
+        self._edge_cache = None
+        self._version += 1
+        self._edge_count -= len(out_neighbors)
 
-        for key in self._adjacency_list:
-            if value in self._adjacency_list[key]:
+        if not self._directed:
+            for key in out_neighbors:
                 del self._adjacency_list[key][value]
+            return
+
+        if self._in_adjacency_list is None:
+            for key in self._adjacency_list:
+                if value in self._adjacency_list[key]:
+                    del self._adjacency_list[key][value]
+                    self._edge_count -= 1
+            return
+
+        for key in self._in_adjacency_list[value]:
+            del self._adjacency_list[key][value]
+        for key in out_neighbors:
+            del self._in_adjacency_list[key][value]
+        self._edge_count -= len(self._in_adjacency_list[value])
+        del self._in_adjacency_list[value]
 
     @_validate
     def add_edge(self, start: T, end: T, weight: int|None = None):
@@ -64,19 +169,67 @@ class Graph[T]:
         if start == end:
             return
 
+        if end not in self._adjacency_list[start]:
+            self._edge_count += 1
+        self._edge_cache = None
+        self._version += 1
         self._adjacency_list[start][end] = weight
 
         # Only add edge one way if graph is a directed graph
         if self._directed:
+            if self._in_adjacency_list is not None:
+                self._in_adjacency_list[end][start] = weight
             return
 
         self._adjacency_list[end][start] = weight
 
+    def add_edges(self, edges: Iterable[tuple], auto_create_vertices: bool = False):
+        """
+        Add several edges at once, given as tuples `(start, end)` or `(start, end, weight)`.
+
+        Instead of validating each edge through `_validate`, every distinct vertex is looked up in the hash table once,
+        up front. Either all the edges are added or, if a vertex is missing, none of them are. Self-referential edges
+        are skipped, as in `add_edge()`.
+        :param edges: The edges to add.
+        :param auto_create_vertices: Whether to add missing vertices instead of raising a `KeyError`.
+        :raises KeyError: If an edge has a vertex not present in the graph and `auto_create_vertices` is `False`.
+        """
+        edges = list(edges)
+        vertices = dict.fromkeys(v for edge in edges for v in edge[:2])
+        missing = [v for v in vertices if v not in self._adjacency_list]
+        if missing:
+            if not auto_create_vertices:
+                raise KeyError(f'Value \'{missing[0]}\' not present in graph.')
+            self.add_vertices(missing)
+
+        # One hash table lookup per distinct vertex rather than per edge
+        out_edges = {v: self._adjacency_list[v] for v in vertices}
+        in_edges = out_edges if not self._directed else \
+            None if self._in_adjacency_list is None else {v: self._in_adjacency_list[v] for v in vertices}
+
+        for edge in edges:
+            start, end = edge[0], edge[1]
+            if start == end:
+                continue
+            weight = edge[2] if len(edge) > 2 else None
+            if end not in out_edges[start]:
+                self._edge_count += 1
+            out_edges[start][end] = weight
+            if in_edges is not None:
+                in_edges[end][start] = weight
+        self._edge_cache = None
+        self._version += 1
+
     @_validate
     def remove_edge(self, start: T, end: T):
         del self._adjacency_list[start][end]
+        self._edge_count -= 1
+        self._edge_cache = None
+        self._version += 1
 
         if self._directed:
+            if self._in_adjacency_list is not None:
+                del self._in_adjacency_list[end][start]
             return
 
         del self._adjacency_list[end][start]
@@ -90,26 +243,114 @@ class Graph[T]:
         """
         return [(key, val) for key, val in self._adjacency_list[value].items()]
 
+    @_validate
+    def in_neighbors(self, value: T) -> [(T, int)]:
+        """
+        Get all the nodes with an edge to the node `value`, along with the weights of those edges.
+
+        This takes `O(v)` time for directed graphs that don't track in-edges.
+        :param value: A value in the graph
+        :return: A list of tuples representing the nodes with an edge to `value` and the weights of their edges
+        """
+        if not self._directed:
+            return self.neighbors(value)
+        if self._in_adjacency_list is not None:
+            return [(key, val) for key, val in self._in_adjacency_list[value].items()]
+        return [(key, self._adjacency_list[key][value]) for key in self._adjacency_list
+                if value in self._adjacency_list[key]]
+
+    @_validate
+    def in_degree(self, value: T) -> int:
+        if not self._directed:
+            return len(self._adjacency_list[value])
+        if self._in_adjacency_list is not None:
+            return len(self._in_adjacency_list[value])
+        return sum(1 for key in self._adjacency_list if value in self._adjacency_list[key])
+
     @_validate
     def is_adjacent(self, first: T, second: T) -> bool:
         return second in self._adjacency_list[first]
 
+    def freeze(self) -> FrozenGraph[T]:
+        """
+        Take an immutable compressed sparse row snapshot of the graph, for algorithms that only read it.
+
+        See `FrozenGraph` for the layout. The snapshot is not affected by later changes to the graph.
+        """
+        return FrozenGraph(self._adjacency_list.items(), directed=self._directed)
+
+    def stats(self) -> dict:
+        """
+        Get the `HashMap.stats()` snapshot of the hash table holding the vertices.
+        """
+        return self._adjacency_list.stats()
+
     def nodes(self) -> [T]:
         return self._adjacency_list.keys()
 
+    @property
+    def edge_count(self) -> int:
+        """
+        The number of edges in the graph, counting each undirected edge once. Kept up to date by every mutation, so
+        this takes `O(1)` time.
+        """
+        return self._edge_count
+
+    def iter_edges(self):
+        """
+        Iterate over the edges of the graph and their weights as tuples `(v1, v2, weight)`, without building a list.
+
+        Each undirected edge is yielded once, from whichever of its vertices comes first in the graph's iteration order.
+        Rather than collecting edges in a set to drop the second direction, the vertices already visited are tracked,
+        which takes `O(v)` space and does not need the vertices to be orderable.
+        """
+        visited = set()
+        for node in self._adjacency_list:
+            for neighbor, weight in self._adjacency_list[node].items():
+                if self._directed or neighbor not in visited:
+                    yield node, neighbor, weight
+            if not self._directed:
+                visited.add(node)
+
     def edges(self) -> [(T, T, int)]:
         """
         Get all the edges of the graph along with their corresponding weights.
 
         Undirected graphs do not return duplicate edges. E.g. an edge from vertex 1 to vertex 2 with weight 5) will not
-        return edges `(1, 2, 5)` and `(2, 1, 5)`, only the former.
+        return edges `(1, 2, 5)` and `(2, 1, 5)`, only one of them.
+
+        The list is cached until the graph's edges change, so repeated calls between mutations only cost a copy.
         :return: A list of tuples `(v1, v2, weight)` representing the edges of the graph and their weights
         """
-        edges = set()
-        for node in self._adjacency_list:
-            for neighbor in self.neighbors(node):
-                edges.add((min(node, neighbor[0]), max(node, neighbor[0]), neighbor[1]))
-        return list(edges)
+        if self._edge_cache is None:
+            self._edge_cache = list(self.iter_edges())
+        # Callers such as kruskal() sort the list they get in place
+        return list(self._edge_cache)
+
+
+def read_edge_list[T](path: str, vertex_type: Callable[[str], T] = int,
+                   weight_type: Callable[[str], int|float] = int) -> Iterator[tuple]:
+    """
+    Lazily read the edges of a text edge list, one `src dst [weight]` line at a time.
+
+    Fields are separated by whitespace. Blank lines and lines starting with `#` are skipped.
+    :param path: The file to read.
+    :param vertex_type: The function converting a vertex field to a vertex, e.g. `int` or `str`.
+    :param weight_type: The function converting a weight field to a weight, e.g. `int` or `float`.
+    :return: An iterator of tuples `(src, dst, weight)`, or `(src, dst)` for lines without a weight
+    :raises ValueError: If a line does not have two or three fields.
+    """
+    with open(path) as file:
+        for line_number, line in enumerate(file, start=1):
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            if len(fields) == 3:
+                yield vertex_type(fields[0]), vertex_type(fields[1]), weight_type(fields[2])
+            elif len(fields) == 2:
+                yield vertex_type(fields[0]), vertex_type(fields[1])
+            else:
+                raise ValueError(f'Expected \'src dst [weight]\' on line {line_number} of \'{path}\'.')
 
 
 if __name__ == '__main__':
@@ -144,3 +385,64 @@ if __name__ == '__main__':
     graph.remove_vertex(2)
     print('Remove 2:')
     print(graph)
+
+    n = 20_000
+    m = 100_000
+    removals = 200
+    print(f'Benchmark: directed graph with {n} vertices and {m} edges, removing {removals} vertices')
+    edge_list = [(random.randrange(n), random.randrange(n)) for _ in range(m)]
+    for track_in_edges in (False, True):
+        tracemalloc.start()
+        graph = Graph[int](directed=True, capacity=n, track_in_edges=track_in_edges)
+        for v in range(n):
+            graph.add_vertex(v)
+        for u, v in edge_list:
+            graph.add_edge(u, v, 1)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for v in random.sample(range(n), removals):
+            graph.remove_vertex(v)
+        elapsed = time.perf_counter() - start
+        print(f'  track_in_edges={track_in_edges}: {memory / 2 ** 20:.1f} MiB, removals took {elapsed:.2f}s')
+
+    n = 100_000
+    m = 500_000
+    print(f'Benchmark: loading {n} vertices and {m} edges')
+    edge_list = [(random.randrange(n), random.randrange(n), random.randint(1, 100)) for _ in range(m)]
+    start = time.perf_counter()
+    graph = Graph[int](directed=True)
+    for v in range(n):
+        graph.add_vertex(v)
+    for u, v, w in edge_list:
+        graph.add_edge(u, v, w)
+    print(f'  add_vertex()/add_edge():              {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    graph = Graph[int](directed=True)
+    graph.add_vertices(range(n))
+    graph.add_edges(edge_list)
+    print(f'  add_vertices()/add_edges():           {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    graph = Graph[int](directed=True)
+    graph.add_edges(edge_list, auto_create_vertices=True)
+    print(f'  add_edges(auto_create_vertices=True): {time.perf_counter() - start:.2f}s')
+
+    m = 1_000_000
+    print(f'Benchmark: start up from a text edge list with {m} edges vs. a saved FrozenGraph')
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, 'edges.txt')
+        binary_path = os.path.join(directory, 'edges.graph')
+        with open(text_path, 'w') as file:
+            for _ in range(m):
+                file.write(f'{random.randrange(n)} {random.randrange(n)} {random.randint(1, 100)}\n')
+
+        start = time.perf_counter()
+        graph = Graph.from_edge_list(text_path, directed=True)
+        print(f'  Graph.from_edge_list(): {time.perf_counter() - start:.2f}s '
+              f'({os.path.getsize(text_path) / 2 ** 20:.1f} MiB)')
+        graph.freeze().save(binary_path)
+        start = time.perf_counter()
+        frozen = FrozenGraph.load(binary_path)
+        print(f'  FrozenGraph.load():     {time.perf_counter() - start:.2f}s '
+              f'({os.path.getsize(binary_path) / 2 ** 20:.1f} MiB)')
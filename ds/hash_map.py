@@ -1,4 +1,8 @@
-from typing import Any, Tuple
+import random
+import sys
+import time
+from array import array
+from typing import Any, Iterable, Tuple
 
 
 class HashMap:
@@ -7,106 +11,299 @@ class HashMap:
     I chose to use open addressing over separate chaining due to the lower amount of average cache misses per lookup
     and made a point to keep track of the load factor and rehash the array any time it increased above 75%.
 
+    Like CPython's dict, the entries themselves are not stored in the probed array. They live in dense, parallel arrays
+    of hashes, keys and values (in insertion order, except that a delete moves the last entry into the freed spot), and
+    the probed array only holds the index of each entry in those arrays. This has a few benefits:
+        - The probed array is a packed `array` of the smallest integer type that fits the number of entries, so it
+          takes only a few bytes per slot, and no tuple is allocated per entry.
+        - Probing compares stored hashes before comparing keys, so unequal keys are rarely compared.
+        - Resizing only rebuilds the probed array from the stored hashes, without calling `hash()` on any key.
+        - Iteration runs over the dense arrays rather than skipping empty slots.
+
+    Collisions are resolved with Robin Hood hashing: while probing for a free slot, a new entry takes the slot of any
+    entry that sits closer to its own home slot, and that displaced entry continues probing instead. This keeps every
+    entry's distance from its home slot (its probe length) close to the average, and lets a lookup stop as soon as it
+    reaches an entry closer to home than the key being looked for would be. Deletes shift the entries that follow back
+    by one slot (backward-shift deletion) rather than leaving a hole that would cut probe chains short.
+
+    Python hashes integers to themselves, so runs of consecutive integer keys would otherwise fill runs of consecutive
+    slots and grow into long clusters. Hashes are therefore scrambled with Fibonacci hashing (multiplying by 2^64
+    divided by the golden ratio and keeping the top bits), which spreads such keys evenly over the array. The array's
+    length is always a power of two for this reason.
+
+    The array only shrinks once the load factor drops below 12.5%, so after any resize the load factor is at least a
+    quarter of the array away from both thresholds and a mix of inserts and deletes cannot make it resize back and
+    forth.
+
+    Passing `track_stats=True` records how long probes are and how often (and for how long) the map resizes, for
+    `stats()` to report. The tracking versions of the probing and resizing methods are only swapped in for that
+    instance, so maps that don't track stats run exactly the same code as before.
+
     Alternatively, we could use a Linked List instead of an array to implement the hash map via Separate Chaining.
     """
-    def __init__(self):
-        self.map: [Tuple[Any, Any] | None] = [None]
-        self.num_entries = 0
+    _MIN_CAPACITY = 8
+    _GROW_LOAD_FACTOR = 0.75
+    _SHRINK_LOAD_FACTOR = 0.125
+    _HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+    _EMPTY = -1
+
+    def __init__(self, capacity: int = 0, track_stats: bool = False):
+        """
+        :param capacity: The number of entries to make room for up front, so that no resizes are needed until the map
+            holds more than `capacity` entries.
+        :param track_stats: Whether to record probe lengths and resizes for `stats()`.
+        """
+        self._hashes = array('Q')
+        self._keys = []
+        self._values = []
+        self._allocate_index(self._capacity_for(capacity))
+
+        self._stats = None
+        if track_stats:
+            self._stats = {
+                'probe_lengths': {},
+                'grows': 0,
+                'grow_seconds': 0.0,
+                'shrinks': 0,
+                'shrink_seconds': 0.0,
+            }
+            self._find = self._find_tracked
+            self._resize = self._resize_tracked
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[Any, Any]]) -> 'HashMap':
+        """
+        Build a map from `(key, value)` pairs (or another map), sizing the array once for all of them.
+        """
+        items = list(items.items() if hasattr(items, 'items') else items)
+        hash_map = cls(capacity=len(items))
+        hash_map.update(items)
+        return hash_map
 
     def __contains__(self, key) -> bool:
-        try:
-            self.__getitem__(key)
-            return True
-        except KeyError:
-            return False
+        return self._find(key, self._scramble(key)) is not None
 
     def __iter__(self):
-        for i in self.map:
-            if i is not None:
-                yield i[0]
-            else:
-                continue
+        return iter(self._keys)
 
     def __getitem__(self, key):
-        hash_val = self._hash(key)
+        pos = self._find(key, self._scramble(key))
+        if pos is None:
+            raise KeyError(str(key))
+        return self._values[self._index[pos]]
 
-        try:
-            while self.map[hash_val] is not None:
-                if self.map[hash_val][0] == key:
-                    return self.map[hash_val][1]
-                hash_val += 1
-                if hash_val >= len(self.map):
-                    hash_val = 0
+    def __setitem__(self, key, value):
+        if self._put(key, value) and self._load_factor > self._GROW_LOAD_FACTOR:
+            self._resize(len(self._index) * 2)
 
+    def __delitem__(self, key):
+        pos = self._find(key, self._scramble(key))
+        if pos is None:
             raise KeyError(str(key))
-        except IndexError:
-            print(f'Hashing error occurred for key {key} with value {hash_val}')
+        entry = self._index[pos]
+
+        # Shift the following slots back by one until reaching an empty slot or an entry already in its home slot
+        next_pos = (pos + 1) & self._mask
+        while self._index[next_pos] != self._EMPTY and self._probe_distance(self._index[next_pos], next_pos) > 0:
+            self._index[pos] = self._index[next_pos]
+            pos = next_pos
+            next_pos = (pos + 1) & self._mask
+        self._index[pos] = self._EMPTY
+
+        # Keep the entry arrays dense by moving the last entry into the freed spot
+        last = self.num_entries - 1
+        if entry != last:
+            self._index[self._find_entry(last)] = entry
+            self._hashes[entry] = self._hashes[last]
+            self._keys[entry] = self._keys[last]
+            self._values[entry] = self._values[last]
+        self._hashes.pop()
+        self._keys.pop()
+        self._values.pop()
 
-    def __setitem__(self, key, value, rehash=True):
-        hash_val: int = self._hash(key)
+        if self._load_factor < self._SHRINK_LOAD_FACTOR and len(self._index) > self._MIN_CAPACITY:
+            self._resize(len(self._index) // 2)
+
+    def _put(self, key, value) -> bool:
+        """
+        Insert or overwrite `key` without checking the load factor.
+        :return: Whether `key` is a new entry
+        """
+        hash_val = self._scramble(key)
+        pos = self._find(key, hash_val)
 
         # Handle overwrites first
-        if self.map[hash_val] is not None and self.map[hash_val][0] == key:
-            self.map[hash_val] = (key, value)
-            return
+        if pos is not None:
+            self._values[self._index[pos]] = value
+            return False
 
-        # For collisions, look for next open spot in array (linear probing)
-        while self.map[hash_val] is not None:
-            new_pos = hash_val + 1
-            hash_val = new_pos if new_pos < len(self.map) else 0
+        self._hashes.append(hash_val)
+        self._keys.append(key)
+        self._values.append(value)
+        self._insert(self.num_entries - 1)
+        return True
 
-        self.map[hash_val] = (key, value)
-        self.num_entries += 1
+    def _find(self, key, hash_val: int) -> int | None:
+        """
+        Find the slot holding `key` in the probed array.
+        :return: The position of the slot, or `None` if `key` is not in the map
+        """
+        # This is the hottest loop in the map, so attribute lookups are hoisted out of it
+        index, hashes, keys, shift, mask = self._index, self._hashes, self._keys, self._hash_shift, self._mask
+        pos = hash_val >> shift
+        distance = 0
+        while (entry := index[pos]) != self._EMPTY:
+            entry_hash = hashes[entry]
+            if entry_hash == hash_val and (keys[entry] is key or keys[entry] == key):
+                return pos
+            # Had the key been inserted, it would have displaced this entry
+            if (pos - (entry_hash >> shift)) & mask < distance:
+                return None
+            pos = (pos + 1) & mask
+            distance += 1
+        return None
 
-        if rehash:
-            self._rehash()
+    def _find_tracked(self, key, hash_val: int) -> int | None:
+        """
+        `_find()`, also counting the number of slots probed in the probe length histogram.
+        """
+        pos = hash_val >> self._hash_shift
+        probes = 1
+        found = None
+        while (entry := self._index[pos]) != self._EMPTY:
+            if self._hashes[entry] == hash_val and (self._keys[entry] is key or self._keys[entry] == key):
+                found = pos
+                break
+            if self._probe_distance(entry, pos) < probes - 1:
+                break
+            pos = (pos + 1) & self._mask
+            probes += 1
 
-    def __delitem__(self, key):
-        hash_val = self._hash(key)
-
-        while self.map[hash_val] is not None:
-            if self.map[hash_val][0] == key:
-                self.map[hash_val] = None
-                self.num_entries -= 1
-                self._rehash()
-                return
-            hash_val += 1
-
-    def _rehash(self):
-        def transfer_map(old_map):
-            for value in old_map:
-                if value is not None:
-                    self.__setitem__(value[0], value[1], rehash=False)
-            self._rehash()
-
-        if self._load_factor > 0.75:
-            old_map = self.map
-            self.map = [None] * len(self.map) * 2
-            self.num_entries = 0
-            transfer_map(old_map)
-            return
-
-        if self._load_factor < 0.25:
-            if self._load_factor == 0 and len(self.map) == 1:
-                return
-            old_map = self.map
-            self.map = [None] * int(len(self.map) / 2)
-            self.num_entries = 0
-            transfer_map(old_map)
-            return
-
-    def _hash(self, key) -> int:
-        return hash(key) % len(self.map)
+        probe_lengths = self._stats['probe_lengths']
+        probe_lengths[probes] = probe_lengths.get(probes, 0) + 1
+        return found
+
+    def _find_entry(self, entry: int) -> int:
+        """
+        Find the slot pointing to entry number `entry`, which must be in the map.
+        """
+        pos = self._hashes[entry] >> self._hash_shift
+        while self._index[pos] != entry:
+            pos = (pos + 1) & self._mask
+        return pos
+
+    def _insert(self, entry: int):
+        """
+        Add a slot for entry number `entry`, whose key is known not to be in the map yet, without checking the load
+        factor.
+        """
+        pos = self._hashes[entry] >> self._hash_shift
+        distance = 0
+
+        # For collisions, look for next open spot in array (linear probing), swapping with any entry closer to home
+        while self._index[pos] != self._EMPTY:
+            resident_distance = self._probe_distance(self._index[pos], pos)
+            if resident_distance < distance:
+                self._index[pos], entry = entry, self._index[pos]
+                distance = resident_distance
+            pos = (pos + 1) & self._mask
+            distance += 1
+
+        self._index[pos] = entry
+
+    @classmethod
+    def _capacity_for(cls, num_entries: int) -> int:
+        """
+        The smallest array length that holds `num_entries` entries without going over the load factor threshold.
+        """
+        capacity = cls._MIN_CAPACITY
+        while num_entries > capacity * cls._GROW_LOAD_FACTOR:
+            capacity *= 2
+        return capacity
+
+    def _allocate_index(self, capacity: int):
+        # Entry numbers are always smaller than the capacity, so use the smallest integer type that can hold them
+        typecode = next(t for t in 'bhiq' if capacity <= 2 ** (array(t).itemsize * 8 - 1))
+        self._index = array(typecode, [self._EMPTY]) * capacity
+        self._mask = capacity - 1
+        self._hash_shift = 64 - (capacity.bit_length() - 1)
+
+    def _resize(self, capacity: int):
+        self._allocate_index(capacity)
+        for entry in range(self.num_entries):
+            self._insert(entry)
+
+    def _resize_tracked(self, capacity: int):
+        kind = 'grow' if capacity > len(self._index) else 'shrink'
+        start = time.perf_counter()
+        HashMap._resize(self, capacity)
+        self._stats[f'{kind}s'] += 1
+        self._stats[f'{kind}_seconds'] += time.perf_counter() - start
+
+    def _scramble(self, key) -> int:
+        return (hash(key) * self._HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF
+
+    def _probe_distance(self, entry: int, pos: int) -> int:
+        return (pos - (self._hashes[entry] >> self._hash_shift)) & self._mask
+
+    @property
+    def num_entries(self) -> int:
+        return len(self._keys)
 
     @property
     def _load_factor(self) -> float:
-        return self.num_entries / len(self.map) if self.num_entries > 0 else 0
+        return self.num_entries / len(self._index)
 
     def __str__(self):
-        return '\n'.join([f'{v[0]}\t|\t{v[1]}' for v in self.map if v is not None]) + '\n'
+        return '\n'.join([f'{k}\t|\t{v}' for k, v in zip(self._keys, self._values)]) + '\n'
 
     def keys(self) -> [Any]:
-        return [v[0] for v in self.map if v is not None]
+        return list(self._keys)
+
+    def values(self) -> [Any]:
+        return list(self._values)
+
+    def items(self) -> [Tuple[Any, Any]]:
+        return list(zip(self._keys, self._values))
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get a snapshot of the map's current shape and, if it was created with `track_stats=True`, of what it has
+        recorded so far.
+        :return: A dict with the keys:
+            - `entries`, `capacity` and `load_factor`: the current size of the map and its array.
+            - `max_probe_distance`: the furthest any entry currently sits from its home slot.
+            - `tracking`: whether the map tracks stats. The keys below are only present if it does.
+            - `probe_lengths`: a histogram mapping the number of slots probed by a lookup to how many lookups did so.
+            - `grows`, `shrinks`: how many times the array has been resized in each direction.
+            - `grow_seconds`, `shrink_seconds`: the total time spent on each kind of resize.
+        """
+        snapshot = {
+            'entries': self.num_entries,
+            'capacity': len(self._index),
+            'load_factor': self._load_factor,
+            'max_probe_distance': max((self._probe_distance(entry, pos) for pos, entry in enumerate(self._index)
+                                       if entry != self._EMPTY), default=0),
+            'tracking': self._stats is not None,
+        }
+        if self._stats is not None:
+            snapshot.update(self._stats)
+            snapshot['probe_lengths'] = dict(sorted(self._stats['probe_lengths'].items()))
+        return snapshot
+
+    def update(self, items: Iterable[Tuple[Any, Any]]):
+        """
+        Insert or overwrite every `(key, value)` pair in `items` (or every entry of another map).
+
+        The array is grown once up front to fit all the pairs, so unlike repeated `__setitem__` calls there are no
+        intermediate resizes and no per-pair load factor checks.
+        """
+        items = list(items.items() if hasattr(items, 'items') else items)
+        capacity = self._capacity_for(self.num_entries + len(items))
+        if capacity > len(self._index):
+            self._resize(capacity)
+        for key, value in items:
+            self._put(key, value)
 
 
 if __name__ == '__main__':
@@ -132,8 +329,75 @@ if __name__ == '__main__':
     hmap['a'] = 'Hello world'
     print('HashMap:\n', hmap)
 
-    # Delete some values (notice the rehash to reduce internal array size and conserve memory)
+    # Track probe lengths and resizes
+    tracked = HashMap(track_stats=True)
+    for i in range(1000):
+        tracked[f'key{i}'] = i
+    for i in range(900):
+        del tracked[f'key{i}']
+    print('Stats: ', tracked.stats())
+
+    # Delete some values
     del hmap[('apple', 'orange', 'banana')]
     del hmap[6512]
     del hmap['a']
     print('HashMap:\n', hmap)
+
+    # Stress test: hold the map at a steady size while replacing random keys, so every insert is paired with a delete
+    n = 100_000
+    ops = 300_000
+    print(f'Benchmark: {ops} insert/delete/lookup rounds on a map holding {n} keys')
+    for map_type in (HashMap, dict):
+        bench_map = map_type()
+        live_keys = list(range(n))
+        for k in live_keys:
+            bench_map[k] = k
+        next_key = n
+        start = time.perf_counter()
+        for _ in range(ops):
+            i = random.randrange(n)
+            del bench_map[live_keys[i]]
+            bench_map[next_key] = next_key
+            live_keys[i] = next_key
+            next_key += 1
+            _ = bench_map[live_keys[random.randrange(n)]]
+        elapsed = time.perf_counter() - start
+        print(f'  {map_type.__name__}: {elapsed:.2f}s ({ops / elapsed:,.0f} rounds/s)')
+
+    n = 200_000
+    lookups = 500_000
+    print(f'Benchmark: {n} string keys, {lookups} random lookups')
+    keys = [f'key{i}' for i in range(n)]
+    bench_map = HashMap()
+    reference = {}
+    for k in keys:
+        bench_map[k] = k
+        reference[k] = k
+    # Only count the map's own storage, not the key and value objects it refers to
+    hash_map_size = sum(sys.getsizeof(a) for a in (bench_map._index, bench_map._hashes, bench_map._keys,
+                                                   bench_map._values))
+    print(f'  memory per entry: HashMap {hash_map_size / n:.1f} bytes, dict {sys.getsizeof(reference) / n:.1f} bytes')
+    lookup_keys = [random.choice(keys) for _ in range(lookups)]
+    for lookup_map in (bench_map, reference):
+        start = time.perf_counter()
+        for k in lookup_keys:
+            _ = lookup_map[k]
+        elapsed = time.perf_counter() - start
+        print(f'  lookups: {type(lookup_map).__name__} {lookups / elapsed:,.0f}/s')
+
+    n = 500_000
+    print(f'Benchmark: building a map of {n} keys')
+    pairs = [(i, i) for i in range(n)]
+    start = time.perf_counter()
+    bench_map = HashMap()
+    for k, v in pairs:
+        bench_map[k] = v
+    print(f'  one key at a time:   {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    bench_map = HashMap(capacity=n)
+    for k, v in pairs:
+        bench_map[k] = v
+    print(f'  presized:            {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    HashMap.from_items(pairs)
+    print(f'  from_items():        {time.perf_counter() - start:.2f}s')
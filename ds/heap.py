@@ -1,20 +1,52 @@
 import random
+import time
+from typing import Iterable
 
 
 class _Heap[T]:
     """
-    An implementation of a binary heap using an array. The sift up and sift down methods
-    are implemented by child classes to exhibit the behavior of a Min Heap and Max Heap accordingly.
+    An implementation of a d-ary heap using an array (binary by default). The comparison between entries is
+    implemented by child classes to exhibit the behavior of a Min Heap and Max Heap accordingly.
+
+    A higher arity makes the heap shallower (`log_d n` levels), so pushes sift up through fewer levels and the
+    children of a node sit next to each other in memory. Pops pay for it by comparing up to `d` children per level,
+    so arities of 4 or 8 suit push-heavy workloads while 2 stays a good default for pop-heavy ones.
 
     Time Complexities:
         - Find max/min element: `O(1)`
-        - Delete/remove max: `O(log n)`
-        - Insert: `O(log n)`
+        - Delete/remove max: `O(d log_d n)`
+        - Insert: `O(log_d n)`
+        - Build from `n` values (`heapify()`): `O(n)`
     """
-    def __init__(self, key: callable = lambda x: x[1]):
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        if arity < 2:
+            raise ValueError('Heap arity must be at least 2.')
         self.key = key
+        self.arity = arity
         self.heap = []
 
+    @classmethod
+    def heapify(cls, values: Iterable[T], priorities: Iterable[int|float|str] = None,
+                key: callable = lambda x: x[1], arity: int = 2) -> '_Heap[T]':
+        """
+        Build a heap from existing values in linear time.
+
+        Rather than pushing the values one at a time (`O(n log n)`), the values are laid out in the array as-is and
+        every non-leaf position is sifted down, starting from the last one. Most positions are close to the bottom of
+        the heap and only sift a level or two, which adds up to `O(n)` overall.
+        :param values: The values to store in the heap.
+        :param priorities: The priorities of `values`, in the same order. Defaults to the values themselves.
+        :param key: The key used to compare heap entries.
+        :param arity: The number of children of each node.
+        :return: A new heap containing `values`
+        """
+        heap = cls(key=key, arity=arity)
+        if priorities is None:
+            heap._build([(value, value) for value in values])
+        else:
+            heap._build(list(zip(values, priorities, strict=True)))
+        return heap
+
     def __contains__(self, item):
         for value, _ in self.heap:
             if value == item:
@@ -41,25 +73,62 @@ class _Heap[T]:
     #         raise TypeError('Parameter must be of type Comparable.') if not None and not isinstance(val, Comparable) else None
 
     def _sift_up(self, current_pos):
-        raise NotImplementedError('Method must be overridden by child class.')
+        # Rather than swapping at every level, hold on to the entry and move each parent down into the hole it leaves
+        entry = self.heap[current_pos]
+        while current_pos > 0:
+            parent_pos = self.parent_pos(current_pos)
+            parent = self.heap[parent_pos]
+            if not self._precedes(entry, parent):
+                break
+            self._set(current_pos, parent)
+            current_pos = parent_pos
+        self._set(current_pos, entry)
 
     def _sift_down(self, current_pos):
+        entry = self.heap[current_pos]
+        size = self.size()
+        while True:
+            first_child_pos = self.first_child_pos(current_pos)
+            if first_child_pos >= size:
+                break
+
+            # Find whichever child should be popped first
+            best_pos = first_child_pos
+            for child_pos in range(first_child_pos + 1, min(first_child_pos + self.arity, size)):
+                if self._precedes(self.heap[child_pos], self.heap[best_pos]):
+                    best_pos = child_pos
+
+            if not self._precedes(self.heap[best_pos], entry):
+                break
+            self._set(current_pos, self.heap[best_pos])
+            current_pos = best_pos
+        self._set(current_pos, entry)
+
+    def _precedes(self, first, second) -> bool:
+        """
+        Whether heap entry `first` should be popped before heap entry `second`.
+        """
         raise NotImplementedError('Method must be overridden by child class.')
 
-    @staticmethod
-    def parent_pos(child_pos: int) -> int:
-        return child_pos // 2
+    def _build(self, entries: list):
+        self.heap = entries
+        for pos in range(self.parent_pos(self.size() - 1), -1, -1):
+            self._sift_down(pos)
 
-    @staticmethod
-    def left_child_pos(parent_pos: int) -> int:
-        return parent_pos * 2 + 1
+    def _set(self, pos: int, entry):
+        self.heap[pos] = entry
 
-    @staticmethod
-    def right_child_pos(parent_pos: int) -> int:
-        return parent_pos * 2 + 2
+    def _discard(self, value: T):
+        pass
+
+    def parent_pos(self, child_pos: int) -> int:
+        return (child_pos - 1) // self.arity
+
+    def first_child_pos(self, parent_pos: int) -> int:
+        return parent_pos * self.arity + 1
 
     def is_leaf(self, pos):
-        return pos == self.size() or pos * 2 > self.size()
+        return self.first_child_pos(pos) >= self.size()
 
     def swap(self, child_pos: int, parent_pos: int):
         self.heap[child_pos], self.heap[parent_pos] = self.heap[parent_pos], self.heap[child_pos]
@@ -70,20 +139,48 @@ class _Heap[T]:
         self._sift_up(current_pos)
 
     def pop(self) -> T:
-        val = self.heap.pop(0)[0]
+        """
+        Remove and return the value at the root of the heap.
+
+        The last entry of the array is moved into the root and sifted down, so nothing else in the array has to shift.
+        """
+        root = self.heap[0]
+        last = self.heap.pop()
+        self._discard(root[0])
         if not self.is_empty():
-            self.heap.insert(0, self.heap.pop())
-        self._sift_down(0)
-        return val
+            self._set(0, last)
+            self._sift_down(0)
+        return root[0]
 
     def peek(self) -> T:
         return self.heap[0][0]
 
-    def replace(self, value: T) -> T:
-        old_val = self.heap.pop(0)
-        self.heap[0] = value
+    def pushpop(self, value: T, priority: int|float|str = None) -> T:
+        """
+        Push `value` onto the heap, then pop and return the root. Faster than `push()` followed by `pop()`.
+
+        If `value` would itself be the new root, it is returned straight away without touching the heap.
+        """
+        entry = (value, value if priority is None else priority)
+        if self.is_empty() or not self._precedes(self.heap[0], entry):
+            return value
+        root = self.heap[0][0]
+        self._discard(root)
+        self._set(0, entry)
         self._sift_down(0)
-        return old_val
+        return root
+
+    def replace(self, value: T, priority: int|float|str = None) -> T:
+        """
+        Pop and return the root, then push `value` onto the heap. Faster than `pop()` followed by `push()`.
+
+        Unlike `pushpop()`, the returned value is always the old root, even if `value` would precede it.
+        """
+        root = self.heap[0][0]
+        self._discard(root)
+        self._set(0, (value, value if priority is None else priority))
+        self._sift_down(0)
+        return root
 
     def update_value(self, value: T, new_priority: int|float|str):
         pos = None
@@ -104,69 +201,93 @@ class _Heap[T]:
 
 
 class MinHeap[T](_Heap):
-    def __init__(self, key: callable = lambda x: x[1]):
-        super().__init__(key=key)
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        super().__init__(key=key, arity=arity)
 
-    def _sift_up(self, current_pos):
-        parent_pos = self.parent_pos(current_pos)
+    def _precedes(self, first, second) -> bool:
+        return self.key(first) < self.key(second)
 
-        while self.key(self.heap[current_pos]) < self.key(self.heap[parent_pos]):
-            self.swap(current_pos, parent_pos)
-            current_pos = self.parent_pos(current_pos)
-            parent_pos = self.parent_pos(current_pos)
 
-    def _sift_down(self, current_pos):
-        if self.is_leaf(current_pos):
-            return
+class MaxHeap[T](_Heap):
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        super().__init__(key=key, arity=arity)
 
-        left_child_pos = self.left_child_pos(current_pos)
-        right_child_pos = self.right_child_pos(current_pos)
+    def _precedes(self, first, second) -> bool:
+        return self.key(first) > self.key(second)
 
-        current_value = self.key(self.heap[current_pos])
-        left_child_value = self.key(self.heap[left_child_pos]) if left_child_pos < self.size() else float('inf')
-        right_child_value = self.key(self.heap[right_child_pos]) if right_child_pos < self.size() else float('inf')
 
-        if current_value > left_child_value or current_value > right_child_value:
-            # Swap with whichever child is smaller
-            if left_child_value < right_child_value:
-                self.swap(current_pos, left_child_pos)
-                self._sift_down(left_child_pos)
-            else:
-                self.swap(current_pos, right_child_pos)
-                self._sift_down(right_child_pos)
+class _IndexedHeap[T](_Heap):
+    """
+    A heap that keeps a map of each value to its position in the array alongside the array itself.
 
+    Every write to the array goes through `_set()` (or `swap()`), so keeping the map up to date only costs `O(1)` per
+    move. In exchange, values must be hashable and may only be present in the heap once.
 
-class MaxHeap[T](_Heap):
-    def __init__(self, key: callable = lambda x: x[1]):
-        super().__init__(key=key)
+    Time Complexities:
+        - Membership check: `O(1)`
+        - Update priority of a value (decrease/increase key): `O(d log_d n)`
+    """
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        super().__init__(key=key, arity=arity)
+        self.positions = {}
 
-    def _sift_up(self, current_pos):
-        parent_pos = self.parent_pos(current_pos)
+    def __contains__(self, item):
+        return item in self.positions
 
-        while self.key(self.heap[current_pos]) > self.key(self.heap[parent_pos]):
-            self.swap(current_pos, parent_pos)
-            current_pos = self.parent_pos(current_pos)
-            parent_pos = self.parent_pos(current_pos)
+    def _build(self, entries: list):
+        self.positions = {entry[0]: pos for pos, entry in enumerate(entries)}
+        if len(self.positions) != len(entries):
+            raise ValueError('Values in an indexed heap must be unique.')
+        super()._build(entries)
 
-    def _sift_down(self, current_pos):
-        if self.is_leaf(current_pos):
-            return
+    def _set(self, pos: int, entry):
+        self.heap[pos] = entry
+        self.positions[entry[0]] = pos
 
-        left_child_pos = self.left_child_pos(current_pos)
-        right_child_pos = self.right_child_pos(current_pos)
+    def _discard(self, value: T):
+        del self.positions[value]
 
-        current_value = self.key(self.heap[current_pos])
-        left_child_value = self.key(self.heap[left_child_pos]) if left_child_pos < self.size() else float('-inf')
-        right_child_value = self.key(self.heap[right_child_pos]) if right_child_pos < self.size() else float('-inf')
+    def swap(self, child_pos: int, parent_pos: int):
+        super().swap(child_pos, parent_pos)
+        self.positions[self.heap[child_pos][0]] = child_pos
+        self.positions[self.heap[parent_pos][0]] = parent_pos
+
+    def push(self, value: T, priority: int|float|str = None):
+        self._check_absent(value)
+        self.positions[value] = self.size()
+        super().push(value, priority)
+
+    def pushpop(self, value: T, priority: int|float|str = None) -> T:
+        self._check_absent(value)
+        return super().pushpop(value, priority)
+
+    def replace(self, value: T, priority: int|float|str = None) -> T:
+        # The root is popped before `value` is pushed, so it may be pushed back
+        if not (self.heap and self.heap[0][0] == value):
+            self._check_absent(value)
+        return super().replace(value, priority)
+
+    def _check_absent(self, value: T):
+        if value in self.positions:
+            raise ValueError(f'Value \'{value}\' already present in heap.')
+
+    def update_value(self, value: T, new_priority: int|float|str):
+        pos = self.positions.get(value)
+        if pos is None:
+            raise ValueError(f'Value \'{value}\' not found in heap.')
+        self.heap[pos] = (value, new_priority)
+        self._sift_up(pos)
+        self._sift_down(self.positions[value])
+
+
+class IndexedMinHeap[T](_IndexedHeap, MinHeap):
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        super().__init__(key=key, arity=arity)
 
-        if current_value < left_child_value or current_value < right_child_value:
-            # Swap with whichever child is larger
-            if left_child_value > right_child_value:
-                self.swap(current_pos, left_child_pos)
-                self._sift_down(left_child_pos)
-            else:
-                self.swap(current_pos, right_child_pos)
-                self._sift_down(right_child_pos)
+
+class IndexedMaxHeap[T](_IndexedHeap, MaxHeap):
+    def __init__(self, key: callable = lambda x: x[1], arity: int = 2):
+        super().__init__(key=key, arity=arity)
 
 
 if __name__ == '__main__':
@@ -209,4 +330,78 @@ if __name__ == '__main__':
     minheap.update_value('D', 4)
     print(minheap)
     while not minheap.is_empty():
-        print(minheap.pop())
\ No newline at end of file
+        print(minheap.pop())
+
+    print()
+
+    indexed_minheap = IndexedMinHeap()
+    indexed_minheap.push('A', 3)
+    indexed_minheap.push('B', 1)
+    indexed_minheap.push('C', 0)
+    indexed_minheap.push('D', 2)
+    print(indexed_minheap, indexed_minheap.positions)
+    print('Is D in heap: ', 'D' in indexed_minheap)
+    indexed_minheap.update_value('D', -1)
+    print(indexed_minheap, indexed_minheap.positions)
+    while not indexed_minheap.is_empty():
+        print(indexed_minheap.pop())
+
+    print()
+
+    n = 1_000_000
+    pops = 100_000
+    print(f'Benchmark: popping {pops} values from a MinHeap of {n} values')
+    values = [random.random() for _ in range(n)]
+
+    start = time.perf_counter()
+    bench_heap = MinHeap.heapify(values)
+    print(f'  heapify():          {time.perf_counter() - start:.2f}s')
+
+    start = time.perf_counter()
+    for _ in range(pops):
+        bench_heap.pop()
+    elapsed = time.perf_counter() - start
+    print(f'  pop():              {elapsed:.2f}s ({pops / elapsed:,.0f} pops/s)')
+
+    start = time.perf_counter()
+    for _ in range(pops):
+        bench_heap.replace(random.random())
+    elapsed = time.perf_counter() - start
+    print(f'  replace():          {elapsed:.2f}s ({pops / elapsed:,.0f} replaces/s)')
+
+    start = time.perf_counter()
+    for _ in range(pops):
+        bench_heap.push(random.random())
+        bench_heap.pop()
+    push_pop_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(pops):
+        bench_heap.pushpop(random.random())
+    elapsed = time.perf_counter() - start
+    print(f'  push() then pop():  {push_pop_elapsed:.2f}s, pushpop(): {elapsed:.2f}s')
+
+    print()
+
+    ops = 200_000
+    print(f'Benchmark: {ops} operations per mix, by heap arity')
+    for arity in (2, 4, 8):
+        # Push-heavy: 9 pushes for every pop, starting from an empty heap
+        bench_heap = MinHeap(arity=arity)
+        start = time.perf_counter()
+        for i in range(ops):
+            if i % 10 == 9:
+                bench_heap.pop()
+            else:
+                bench_heap.push(random.random())
+        push_heavy_elapsed = time.perf_counter() - start
+
+        # Pop-heavy: 9 pops for every push, starting from a heap holding every value to be popped
+        bench_heap = MinHeap.heapify((random.random() for _ in range(ops)), arity=arity)
+        start = time.perf_counter()
+        for i in range(ops):
+            if i % 10 == 9:
+                bench_heap.push(random.random())
+            else:
+                bench_heap.pop()
+        pop_heavy_elapsed = time.perf_counter() - start
+        print(f'  arity {arity}: push-heavy {push_heavy_elapsed:.2f}s, pop-heavy {pop_heavy_elapsed:.2f}s')
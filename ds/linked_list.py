@@ -60,11 +60,11 @@ class LinkedList[T]:
             node = node.next
         return " <-> ".join(nodes)
 
-    def add(self, data: T):
+    def add(self, data: T) -> _LinkedListNode:
         """
         Add a node to the end of the list.
         :param data:
-        :return:
+        :return: The new node, which can later be passed to `remove_node()` or `move_to_end()`.
         """
         if self.head is None:
             self.head = _LinkedListNode(data, None, None)
@@ -72,6 +72,36 @@ class LinkedList[T]:
         else:
             self.tail.next = _LinkedListNode(data, None, self.tail)
             self.tail = self.tail.next
+        return self.tail
+
+    def remove_node(self, node: _LinkedListNode) -> T:
+        """
+        Unlink a node of this list in `O(1)` time, without having to search for it.
+        :param node: A node returned by `add()` or `find()`, or reached by iterating over this list.
+        :return: The data of the removed node.
+        """
+        if node.prev is None:
+            self.head = node.next
+        else:
+            node.prev.next = node.next
+        if node.next is None:
+            self.tail = node.prev
+        else:
+            node.next.prev = node.prev
+        node.prev = None
+        node.next = None
+        return node.data
+
+    def move_to_end(self, node: _LinkedListNode):
+        """
+        Move a node of this list to the end of the list in `O(1)` time.
+        """
+        if node is self.tail:
+            return
+        self.remove_node(node)
+        node.prev = self.tail
+        self.tail.next = node
+        self.tail = node
 
     def insert_at[int](self, data: T, index: int = 0):
         """
@@ -0,0 +1,236 @@
+import functools
+import random
+import time
+from typing import Any, Callable
+
+from ds.hash_map import HashMap
+from ds.linked_list import LinkedList
+
+
+class _CacheEntry:
+    def __init__(self, key, value, size: int, expires_at: float | None):
+        self.key = key
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+    def __str__(self):
+        return f'{self.key}: {self.value}'
+
+
+class LRUCache[K, V]:
+    """
+    A bounded cache that evicts its least recently used entries, with optional per-entry expiry (TTL).
+
+    The cache combines the two structures it needs for `O(1)` operations: a `HashMap` from each key to its node in a
+    doubly linked `LinkedList`, which keeps the entries ordered from least to most recently used. A hit moves its node
+    to the end of the list, and evictions remove nodes from the front.
+
+    Each entry has a size (1 by default, or whatever `sizeof(value)` returns), and entries are evicted until the total
+    size is within `max_size`. Expired entries are dropped lazily: when they are looked up, and on every `put()` while
+    the least recently used entry has expired. An expired entry behind an unexpired one (entries can have different
+    TTLs) is only dropped once it is looked up or reaches the front, and until then it still counts towards `len()`
+    and the total size.
+
+    Time Complexities:
+        - Get: `O(1)`
+        - Put: `O(1)` amortized, plus `O(1)` per evicted entry
+        - Delete: `O(1)`
+    """
+    def __init__(self, max_size: int = 128, ttl: float | None = None, sizeof: Callable[[V], int] | None = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param max_size: The maximum total size of the entries in the cache.
+        :param ttl: The default number of seconds an entry stays valid for. Entries never expire if `None`.
+        :param sizeof: A function giving the size of a value. Every entry has a size of 1 if `None`.
+        :param clock: The function used to get the current time, in seconds.
+        """
+        if max_size < 1:
+            raise ValueError('Cache size must be at least 1.')
+        self.max_size = max_size
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._clock = clock
+        self._nodes = HashMap()
+        self._order = LinkedList[_CacheEntry]()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return self._nodes.num_entries
+
+    def __contains__(self, key: K) -> bool:
+        """
+        Whether `key` is cached and unexpired. Unlike `get()`, this does not count as a use of the entry.
+        """
+        if key not in self._nodes:
+            return False
+        return not self._expired(self._nodes[key].data)
+
+    def __getitem__(self, key: K) -> V:
+        node = self._lookup(key)
+        if node is None:
+            raise KeyError(str(key))
+        return node.data.value
+
+    def __setitem__(self, key: K, value: V):
+        self.put(key, value)
+
+    def __delitem__(self, key: K):
+        self._remove(self._nodes[key])
+
+    def __str__(self):
+        return str(self._order)
+
+    def _expired(self, entry: _CacheEntry) -> bool:
+        return entry.expires_at is not None and entry.expires_at <= self._clock()
+
+    def _lookup(self, key: K):
+        """
+        Find the node of `key`, updating the hit and miss counters and dropping the entry if it has expired.
+        """
+        if key not in self._nodes:
+            self.misses += 1
+            return None
+        node = self._nodes[key]
+        if self._expired(node.data):
+            self._remove(node)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._order.move_to_end(node)
+        self.hits += 1
+        return node
+
+    def _remove(self, node):
+        entry = self._order.remove_node(node)
+        del self._nodes[entry.key]
+        self.size -= entry.size
+
+    def get(self, key: K, default: V = None) -> V:
+        node = self._lookup(key)
+        return default if node is None else node.data.value
+
+    def put(self, key: K, value: V, ttl: float | None = None):
+        """
+        Cache `value` under `key`, evicting least recently used entries until the cache is back within `max_size`.
+        :param ttl: The number of seconds this entry stays valid for. Defaults to the cache's `ttl`.
+        :raises ValueError: If the value alone is larger than `max_size`.
+        """
+        size = self._sizeof(value) if self._sizeof is not None else 1
+        if size > self.max_size:
+            raise ValueError(f'Value of size {size} does not fit in a cache of size {self.max_size}.')
+        ttl = self.ttl if ttl is None else ttl
+        entry = _CacheEntry(key, value, size, None if ttl is None else self._clock() + ttl)
+
+        if key in self._nodes:
+            self._remove(self._nodes[key])
+        self._nodes[key] = self._order.add(entry)
+        self.size += size
+
+        # The list can only run empty if the new entry itself expired straight away, with a TTL of 0
+        while self.size > self.max_size or (self._order.head is not None and self._expired(self._order.head.data)):
+            oldest = self._order.head
+            if self._expired(oldest.data):
+                self.expirations += 1
+            else:
+                self.evictions += 1
+            self._remove(oldest)
+
+    def clear(self):
+        self._nodes = HashMap()
+        self._order = LinkedList[_CacheEntry]()
+        self.size = 0
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get a snapshot of the cache's counters.
+        :return: A dict with the number of `entries`, their total `size`, and the number of `hits`, `misses`,
+            `evictions` (entries dropped to make room) and `expirations` (entries dropped after their TTL) so far.
+        """
+        return {
+            'entries': len(self),
+            'size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+def memoize(max_size: int = 128, ttl: float | None = None):
+    """
+    Decorator caching the results of a function in an `LRUCache`, keyed by its arguments. The arguments must be
+    hashable.
+
+    Objects like `Graph` are hashed by identity, so results computed for a graph are still returned after the graph has
+    been mutated. Call `cache.clear()` on the decorated function after changing an argument in place.
+
+    The cache is available as the `cache` attribute of the decorated function.
+    """
+    def decorator(func):
+        cache = LRUCache(max_size=max_size, ttl=ttl)
+        missing = object()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args + (missing, *sorted(kwargs.items())) if kwargs else args
+            result = cache.get(key, missing)
+            if result is missing:
+                result = func(*args, **kwargs)
+                cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+if __name__ == '__main__':
+    cache = LRUCache[str, int](max_size=3)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache['c'] = 3
+    print(cache)
+    print('a: ', cache['a'])
+    cache['d'] = 4  # evicts 'b', the least recently used entry
+    print(cache)
+    print('b: ', cache.get('b'))
+
+    cache.put('e', 5, ttl=0)
+    print('e (expired): ', cache.get('e'))
+    print('Stats: ', cache.stats())
+
+    @memoize(max_size=100)
+    def fibonacci(n: int) -> int:
+        return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+    print('fibonacci(80): ', fibonacci(80), fibonacci.cache.stats())
+
+    print()
+
+    # Zipfian access trace: the k-th most popular key is requested with probability proportional to 1 / k^s
+    keys = 100_000
+    requests = 500_000
+    for skew in (0.8, 1.0, 1.2):
+        trace = random.choices(range(keys), weights=[1 / (k + 1) ** skew for k in range(keys)], k=requests)
+        print(f'Benchmark: {requests} requests over {keys} keys, Zipf s={skew}')
+        for max_size in (1_000, 10_000):
+            cache = LRUCache(max_size=max_size)
+            start = time.perf_counter()
+            for key in trace:
+                if cache.get(key) is None:
+                    cache.put(key, key)
+            elapsed = time.perf_counter() - start
+
+            reference = functools.lru_cache(maxsize=max_size)(lambda key: key)
+            reference_start = time.perf_counter()
+            for key in trace:
+                reference(key)
+            reference_elapsed = time.perf_counter() - reference_start
+
+            print(f'  size {max_size}: hit rate {cache.hits / requests:.1%}, {requests / elapsed:,.0f} requests/s '
+                  f'(functools.lru_cache: {requests / reference_elapsed:,.0f} requests/s)')
@@ -0,0 +1,364 @@
+import itertools
+import random
+import time
+import tracemalloc
+from typing import Iterable, Iterator, Tuple
+
+from ds.frozen_graph import FrozenGraph
+from ds.graph import Graph
+from ds.hash_map import HashMap
+
+
+# Marks the ids of removed vertices until they are reused
+_FREE = object()
+_BINARY_DIGIT_FLAGS = bytes.maketrans(b'01', b'\0\1')
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    """
+    Iterate over the positions of the set bits of `bits`, lowest first.
+    """
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def _bit_flags(bits: int) -> bytes:
+    """
+    Spell out `bits` as one byte per bit, lowest bit first, that is 1 where the bit is set and 0 otherwise.
+    """
+    return bin(bits)[:1:-1].encode().translate(_BINARY_DIGIT_FLAGS)
+
+
+class MatrixGraph[T](Graph[T]):
+    """
+    A `Graph` stored as an adjacency matrix, for dense graphs. Create one with `Graph(backend='matrix')`.
+
+    Every vertex is interned to an integer id through a `HashMap`. Row `i` of the matrix is a packed bitset (a
+    `bytearray` holding one bit per vertex) with bit `j` set if there is an edge from vertex `i` to vertex `j`, and the
+    weight of that edge is kept in a dense `v` by `v` list of lists. Testing or changing a bit only touches one byte,
+    and scanning a row converts the whole bitset to an `int` at once. Sparse rows then walk their set bits with
+    `bits & -bits`, and dense rows spell the bits out as a byte string of flags for `itertools.compress()` to select the
+    neighbors and weights with, which skips the per-neighbor Python loop altogether.
+    The ids of removed vertices are reused by the next vertices added.
+
+    This trades `O(v^2)` memory for dropping a dict entry per edge: on nearly complete graphs the matrix is the
+    smaller of the two, and adjacency tests only do bit arithmetic instead of a dict lookup. On sparse graphs the dict
+    backend is both smaller and faster, since scanning a row costs `O(v)` no matter how few neighbors it has.
+
+    Time Complexities:
+        - Add vertex: `O(1)` amortized (growing the matrix takes `O(v^2)`, but its capacity doubles each time)
+        - Add edge: `O(1)`
+        - Remove edge: `O(1)`
+        - Check if nodes `x`, and `y` are adjacent: `O(1)`
+        - Retrieve neighbors of node X: `O(v)` where `v` is the number of vertices in the graph
+        - Remove vertex: `O(v)`
+    """
+    def __init__(self, directed=False, capacity: int = 0, track_stats: bool = False, track_in_edges: bool = False,
+                 *, backend: str = 'matrix'):
+        """
+        :param directed: Whether edges only go from their start to their end vertex.
+        :param capacity: The number of vertices to make room for up front, in both the matrix and the id hash table.
+        :param track_stats: Whether the id hash table records probe lengths and resizes (see `stats()`).
+        :param track_in_edges: Whether a directed graph also keeps a bitset of the edges into each vertex (the columns
+            of the matrix), making `in_neighbors()` and removing a vertex proportional to the vertex's degree.
+        """
+        self._directed = directed
+        self._ids = HashMap(capacity=capacity, track_stats=track_stats)
+        self._vertices = []
+        self._free_ids = []
+        self._rows = []
+        self._columns = [] if directed and track_in_edges else None
+        self._weights = []
+        self._capacity = 0
+        self._edge_count = 0
+        self._edge_cache = None
+        self._version = 0
+        self._reserve(capacity)
+
+    def __contains__(self, item):
+        return item in self._ids
+
+    def __str__(self):
+        return '\n'.join([f'{v}\t|\t{dict(self._iter_neighbors(i))}' for i, v in enumerate(self._vertices)
+                          if v is not _FREE]) + '\n'
+
+    def _id(self, value: T) -> int:
+        try:
+            return self._ids[value]
+        except KeyError:
+            raise KeyError(f'Value \'{value}\' not present in graph.') from None
+
+    def _reserve(self, capacity: int):
+        """
+        Grow the matrix to fit at least `capacity` vertices, at least doubling its size.
+        """
+        if capacity <= self._capacity:
+            return
+        # Keep the capacity a multiple of 8, so the bitsets are whole bytes
+        new_capacity = -(-max(capacity, 2 * self._capacity, 8) // 8) * 8
+        padding = new_capacity - self._capacity
+        for bitsets in (self._rows, self._columns or []):
+            for bitset in bitsets:
+                bitset.extend(bytes(padding // 8))
+        for row in self._weights:
+            row.extend([None] * padding)
+        self._weights.extend([None] * new_capacity for _ in range(padding))
+        self._capacity = new_capacity
+
+    def _new_id(self) -> int:
+        if self._free_ids:
+            return self._free_ids.pop()
+        self._reserve(len(self._vertices) + 1)
+        self._vertices.append(_FREE)
+        self._rows.append(bytearray(self._capacity // 8))
+        if self._columns is not None:
+            self._columns.append(bytearray(self._capacity // 8))
+        return len(self._vertices) - 1
+
+    def _iter_neighbors(self, vertex_id: int, bits: int = None) -> Iterator[Tuple[T, object]]:
+        """
+        Iterate over the neighbors (node, weight) of the vertex with id `vertex_id`, or just those selected by `bits`.
+        """
+        vertices, weights = self._vertices, self._weights[vertex_id]
+        if bits is None:
+            bits = int.from_bytes(self._rows[vertex_id], 'little')
+        # Past about one neighbor in eight, masking the whole row beats visiting the set bits one by one
+        if bits.bit_count() * 8 < len(vertices):
+            return ((vertices[j], weights[j]) for j in _iter_bits(bits))
+        return itertools.compress(zip(vertices, weights), _bit_flags(bits))
+
+    def add_vertex(self, value: T):
+        if value not in self._ids:
+            vertex_id = self._new_id()
+            self._vertices[vertex_id] = value
+            self._ids[value] = vertex_id
+            self._version += 1
+
+    def add_vertices(self, values: Iterable[T]):
+        """
+        Add several vertices at once, skipping any already in the graph. The matrix is grown at most once.
+        """
+        new_values = [value for value in dict.fromkeys(values) if value not in self._ids]
+        self._reserve(len(self._vertices) + len(new_values) - len(self._free_ids))
+        new_ids = [self._new_id() for _ in new_values]
+        for value, vertex_id in zip(new_values, new_ids):
+            self._vertices[vertex_id] = value
+        self._ids.update(zip(new_values, new_ids))
+        self._version += 1
+
+    def remove_vertex(self, value: T):
+        i = self._id(value)
+        del self._ids[value]
+        self._edge_cache = None
+        self._version += 1
+        byte, mask = i >> 3, 1 << (i & 7)
+        rows, weights = self._rows, self._weights
+        out_neighbors = list(_iter_bits(int.from_bytes(rows[i], 'little')))
+        self._edge_count -= len(out_neighbors)
+
+        if not self._directed:
+            sources = out_neighbors
+        elif self._columns is not None:
+            sources = list(_iter_bits(int.from_bytes(self._columns[i], 'little')))
+            for j in out_neighbors:
+                self._columns[j][byte] &= ~mask
+            self._columns[i] = bytearray(self._capacity // 8)
+        else:
+            sources = [j for j in range(len(rows)) if rows[j][byte] & mask]
+        for j in sources:
+            rows[j][byte] &= ~mask
+            weights[j][i] = None
+        if self._directed:
+            self._edge_count -= len(sources)
+
+        for j in out_neighbors:
+            weights[i][j] = None
+        rows[i] = bytearray(self._capacity // 8)
+        self._vertices[i] = _FREE
+        self._free_ids.append(i)
+
+    def add_edge(self, start: T, end: T, weight: int|None = None):
+        """
+        Add an edge from `start` to `end` with optional weight `weight`.
+
+        Self-referential edges are disallowed.
+        :param start: The source node of the edge. Must already be present in the graph.
+        :param end: The sink node of the edge. Must already be present in the graph.
+        :param weight: An integer value representing the weight of the edge.
+        :return: None
+        """
+        i, j = self._id(start), self._id(end)
+        if i == j:
+            return
+        self._set_edge(i, j, weight)
+        self._edge_cache = None
+        self._version += 1
+
+    def _set_edge(self, i: int, j: int, weight):
+        row = self._rows[i]
+        if not row[j >> 3] & 1 << (j & 7):
+            self._edge_count += 1
+            row[j >> 3] |= 1 << (j & 7)
+            if not self._directed:
+                self._rows[j][i >> 3] |= 1 << (i & 7)
+            elif self._columns is not None:
+                self._columns[j][i >> 3] |= 1 << (i & 7)
+        self._weights[i][j] = weight
+        if not self._directed:
+            self._weights[j][i] = weight
+
+    def add_edges(self, edges: Iterable[tuple], auto_create_vertices: bool = False):
+        """
+        Add several edges at once, given as tuples `(start, end)` or `(start, end, weight)`. See `Graph.add_edges()`.
+        :raises KeyError: If an edge has a vertex not present in the graph and `auto_create_vertices` is `False`.
+        """
+        edges = list(edges)
+        vertices = dict.fromkeys(v for edge in edges for v in edge[:2])
+        missing = [v for v in vertices if v not in self._ids]
+        if missing:
+            if not auto_create_vertices:
+                raise KeyError(f'Value \'{missing[0]}\' not present in graph.')
+            self.add_vertices(missing)
+
+        ids = {v: self._ids[v] for v in vertices}
+        for edge in edges:
+            i, j = ids[edge[0]], ids[edge[1]]
+            if i != j:
+                self._set_edge(i, j, edge[2] if len(edge) > 2 else None)
+        self._edge_cache = None
+        self._version += 1
+
+    def remove_edge(self, start: T, end: T):
+        i, j = self._id(start), self._id(end)
+        if not self._rows[i][j >> 3] & 1 << (j & 7):
+            raise KeyError(end)
+        self._rows[i][j >> 3] &= ~(1 << (j & 7))
+        self._weights[i][j] = None
+        self._edge_count -= 1
+        self._edge_cache = None
+        self._version += 1
+
+        if self._directed:
+            if self._columns is not None:
+                self._columns[j][i >> 3] &= ~(1 << (i & 7))
+            return
+
+        self._rows[j][i >> 3] &= ~(1 << (i & 7))
+        self._weights[j][i] = None
+
+    def neighbors(self, value: T) -> [(T, int)]:
+        """
+        Get all the neighbors (node, weight) of the node `value`.
+        :param value: A value in the graph
+        :return: A list of tuples representing the neighbors of `value` and the weights of their edges
+        """
+        return list(self._iter_neighbors(self._id(value)))
+
+    def _in_ids(self, i: int) -> Iterable[int]:
+        if self._columns is not None:
+            return _iter_bits(int.from_bytes(self._columns[i], 'little'))
+        byte, mask = i >> 3, 1 << (i & 7)
+        return (j for j, row in enumerate(self._rows) if row[byte] & mask)
+
+    def in_neighbors(self, value: T) -> [(T, int)]:
+        """
+        Get all the nodes with an edge to the node `value`, along with the weights of those edges.
+        :param value: A value in the graph
+        :return: A list of tuples representing the nodes with an edge to `value` and the weights of their edges
+        """
+        if not self._directed:
+            return self.neighbors(value)
+        i = self._id(value)
+        return [(self._vertices[j], self._weights[j][i]) for j in self._in_ids(i)]
+
+    def in_degree(self, value: T) -> int:
+        i = self._id(value)
+        if not self._directed:
+            return int.from_bytes(self._rows[i], 'little').bit_count()
+        if self._columns is not None:
+            return int.from_bytes(self._columns[i], 'little').bit_count()
+        return sum(1 for _ in self._in_ids(i))
+
+    def is_adjacent(self, first: T, second: T) -> bool:
+        j = self._id(second)
+        return bool(self._rows[self._id(first)][j >> 3] & 1 << (j & 7))
+
+    def freeze(self) -> FrozenGraph[T]:
+        """
+        Take an immutable compressed sparse row snapshot of the graph, for algorithms that only read it.
+        """
+        return FrozenGraph([(v, dict(self._iter_neighbors(i))) for i, v in enumerate(self._vertices)
+                            if v is not _FREE], directed=self._directed)
+
+    def stats(self) -> dict:
+        """
+        Get the `HashMap.stats()` snapshot of the hash table mapping vertices to their ids.
+        """
+        return self._ids.stats()
+
+    def nodes(self) -> [T]:
+        """
+        Get the vertices in the order of their ids, which is the order they were added in unless vertices were removed.
+        """
+        return [v for v in self._vertices if v is not _FREE]
+
+    def iter_edges(self):
+        """
+        Iterate over the edges of the graph and their weights as tuples `(v1, v2, weight)`, without building a list.
+
+        Each undirected edge is yielded once, from whichever of its vertices has the lower id.
+        """
+        vertices = self._vertices
+        for i, row in enumerate(self._rows):
+            bits = int.from_bytes(row, 'little')
+            if not self._directed:
+                bits = bits >> (i + 1) << (i + 1)
+            for neighbor, weight in self._iter_neighbors(i, bits):
+                yield vertices[i], neighbor, weight
+
+
+if __name__ == '__main__':
+    graph = Graph[int](backend='matrix')
+    for v in range(1, 6):
+        graph.add_vertex(v)
+    graph.add_edges([(1, 2, 3), (1, 3, 1), (2, 4, 2), (2, 5, 4), (3, 4, 6), (4, 5, 5)])
+    print(graph)
+    print('Neighbors of node 2: ', graph.neighbors(2))
+    print('Is 2 adjacent to 3: ', graph.is_adjacent(2, 3))
+    graph.remove_vertex(2)
+    print('Remove 2:')
+    print(graph)
+    print('Edges: ', graph.edges())
+
+    print()
+
+    n = 1000
+    queries = 200_000
+    print(f'Benchmark: directed graphs with {n} vertices, {queries} adjacency tests and a neighbor scan of every vertex')
+    for density in (0.01, 0.05, 0.1, 0.25, 0.5, 0.9):
+        edge_list = [(u, v, random.randint(1, 100)) for u in range(n) for v in range(n)
+                     if u != v and random.random() < density]
+        pairs = [(random.randrange(n), random.randrange(n)) for _ in range(queries)]
+        results = []
+        for backend in ('hash', 'matrix'):
+            tracemalloc.start()
+            graph = Graph[int](directed=True, backend=backend)
+            graph.add_vertices(range(n))
+            graph.add_edges(edge_list)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            for u, v in pairs:
+                graph.is_adjacent(u, v)
+            adjacency_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for v in range(n):
+                graph.neighbors(v)
+            scan_time = time.perf_counter() - start
+            results.append(f'{backend} {memory / 2 ** 20:5.1f} MiB, is_adjacent {adjacency_time:.2f}s, '
+                           f'neighbors {scan_time:.2f}s')
+        print(f'  density {density:.2f}: ' + ' | '.join(results))
@@ -0,0 +1,210 @@
+import random
+import time
+
+from ds.heap import IndexedMinHeap
+
+
+class _PairingHeapNode:
+    """
+    A node in a pairing heap.
+
+    Each node points to its leftmost child and its next sibling. It also points back to the previous node, which is
+    either its left sibling or (for a leftmost child) its parent, so that a node can be cut out of the tree in `O(1)`.
+    """
+    def __init__(self, value, priority):
+        self.value = value
+        self.priority = priority
+        self.child = None
+        self.sibling = None
+        self.prev = None
+
+    def __str__(self):
+        return f'[ {self.value}: {self.priority} ]'
+
+
+class PairingHeap[T]:
+    """
+    A min pairing heap: a pointer-based heap-ordered tree where the children of a node are kept as a linked list.
+
+    Inserting and melding simply link two trees together, making the root with the larger priority the leftmost child
+    of the other. Decreasing a priority cuts the node's subtree out and links it back to the root. All the
+    restructuring is deferred to `pop()`, which merges the children of the old root in two passes (pairing them up
+    left to right, then folding the pairs right to left). This makes it a good fit for decrease-key heavy workloads
+    like Dijkstra's algorithm on dense graphs.
+
+    Like `IndexedMinHeap`, a map of each value to its node is kept, so values must be hashable and unique.
+
+    Time Complexities:
+        - Find min element: `O(1)`
+        - Insert: `O(1)`
+        - Meld: `O(1)`
+        - Decrease key: amortized `o(log n)` (constant in practice)
+        - Delete/remove min: amortized `O(log n)`
+    """
+    def __init__(self):
+        self.root = None
+        self.nodes = {}
+
+    def __contains__(self, item):
+        return item in self.nodes
+
+    def __str__(self):
+        return str([(value, node.priority) for value, node in self.nodes.items()])
+
+    @staticmethod
+    def _link(first: _PairingHeapNode | None, second: _PairingHeapNode | None) -> _PairingHeapNode | None:
+        """
+        Link two detached trees, making the root with the larger priority the leftmost child of the other.
+        """
+        if first is None:
+            return second
+        if second is None:
+            return first
+        if second.priority < first.priority:
+            first, second = second, first
+        second.prev = first
+        second.sibling = first.child
+        if first.child is not None:
+            first.child.prev = second
+        first.child = second
+        return first
+
+    @staticmethod
+    def _cut(node: _PairingHeapNode):
+        """
+        Detach the subtree rooted at `node` from its parent and siblings.
+        """
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.prev = None
+        node.sibling = None
+
+    def _merge_pairs(self, first: _PairingHeapNode | None) -> _PairingHeapNode | None:
+        """
+        Merge a list of sibling trees into a single tree using the standard two-pass pairing.
+        """
+        pairs = []
+        while first is not None:
+            second = first.sibling
+            next_first = second.sibling if second is not None else None
+            first.prev = first.sibling = None
+            if second is not None:
+                second.prev = second.sibling = None
+            pairs.append(self._link(first, second))
+            first = next_first
+
+        root = None
+        for tree in reversed(pairs):
+            root = self._link(tree, root)
+        return root
+
+    def _check_absent(self, value: T):
+        if value in self.nodes:
+            raise ValueError(f'Value \'{value}\' already present in heap.')
+
+    def push(self, value: T, priority: int|float|str = None):
+        self._check_absent(value)
+        node = _PairingHeapNode(value, value if priority is None else priority)
+        self.nodes[value] = node
+        self.root = self._link(self.root, node)
+
+    def pop(self) -> T:
+        if self.root is None:
+            raise IndexError('Heap is empty')
+        root = self.root
+        del self.nodes[root.value]
+        self.root = self._merge_pairs(root.child)
+        return root.value
+
+    def peek(self) -> T:
+        if self.root is None:
+            raise IndexError('Heap is empty')
+        return self.root.value
+
+    def update_value(self, value: T, new_priority: int|float|str):
+        """
+        Change the priority of `value`.
+
+        Decreasing the priority is the cheap case: the node's subtree is cut out and linked back to the root.
+        Increasing it may break heap order with the node's own children, so the node is removed from the tree
+        entirely, its children are merged back in, and it is then re-inserted on its own.
+        """
+        node = self.nodes.get(value)
+        if node is None:
+            raise ValueError(f'Value \'{value}\' not found in heap.')
+
+        if new_priority < node.priority:
+            node.priority = new_priority
+            if node is not self.root:
+                self._cut(node)
+                self.root = self._link(self.root, node)
+        elif new_priority > node.priority:
+            if node is self.root:
+                self.root = None
+            else:
+                self._cut(node)
+            children = self._merge_pairs(node.child)
+            node.child = None
+            node.priority = new_priority
+            self.root = self._link(self._link(self.root, children), node)
+
+    def meld(self, other: 'PairingHeap[T]'):
+        """
+        Move every value of `other` into this heap in `O(1)`, leaving `other` empty.
+        :raises ValueError: If the heaps share any values.
+        """
+        if not self.nodes.keys().isdisjoint(other.nodes.keys()):
+            raise ValueError('Cannot meld heaps that share values.')
+        self.root = self._link(self.root, other.root)
+        self.nodes.update(other.nodes)
+        other.root = None
+        other.nodes = {}
+
+    def size(self) -> int:
+        return len(self.nodes)
+
+    def is_empty(self) -> bool:
+        return self.root is None
+
+
+if __name__ == '__main__':
+    heap = PairingHeap()
+    heap.push('A', 3)
+    heap.push('B', 1)
+    heap.push('C', 0)
+    heap.push('D', 2)
+    print(heap)
+    heap.update_value('D', -1)
+    heap.update_value('C', 5)
+    print(heap)
+
+    other = PairingHeap()
+    other.push('E', 4)
+    other.push('F', -2)
+    heap.meld(other)
+    print('Melded: ', heap)
+    while not heap.is_empty():
+        print(heap.pop())
+
+    print()
+
+    n = 100_000
+    decreases = 500_000
+    print(f'Benchmark: {n} pushes, {decreases} decrease-keys, then {n} pops')
+    for heap_type in (IndexedMinHeap, PairingHeap):
+        bench_heap = heap_type()
+        priorities = {i: random.random() * n for i in range(n)}
+        start = time.perf_counter()
+        for value, priority in priorities.items():
+            bench_heap.push(value, priority)
+        for _ in range(decreases):
+            value = random.randrange(n)
+            priorities[value] *= 0.9
+            bench_heap.update_value(value, priorities[value])
+        while not bench_heap.is_empty():
+            bench_heap.pop()
+        print(f'  {heap_type.__name__}: {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,136 @@
+import random
+import time
+
+from ds.heap import IndexedMinHeap
+
+
+class RadixHeap[T]:
+    """
+    A min radix heap: a priority queue for non-negative integer priorities that never go below the last popped
+    priority (monotone priorities), such as the distances in Dijkstra's algorithm with integer edge weights.
+
+    Values are kept in buckets by how far their priority is from the last popped priority `last`: bucket `i` holds
+    the priorities whose highest bit differing from `last` is bit `i - 1`, and bucket 0 holds `last` itself. When
+    bucket 0 is empty, pop finds the first non-empty bucket, makes its smallest priority the new `last` and spreads its
+    values out over the lower buckets. A value can only move to a lower bucket, so it is moved at most `log C` times
+    over its whole life in the heap, and unlike Dial's bucket queue, the spread of the priorities does not matter.
+    There are 65 buckets to begin with, covering 64 bit priorities, and more are added for any priority needing more
+    bits, since Python ints (and sums of path weights) have no fixed size.
+
+    Each bucket is a dict used as an ordered set, so values must be hashable and unique, as with `IndexedMinHeap`.
+
+    Time Complexities:
+        - Insert: `O(1)`
+        - Decrease key: `O(1)`
+        - Delete/remove min: `O(log C)` amortized, where `C` is the largest priority
+    """
+    _INITIAL_BUCKETS = 65
+
+    def __init__(self):
+        self.buckets = [dict() for _ in range(self._INITIAL_BUCKETS)]
+        self.priorities = {}
+        self.last = 0
+
+    def __contains__(self, item):
+        return item in self.priorities
+
+    def __str__(self):
+        return str(sorted(self.priorities.items(), key=lambda entry: entry[1]))
+
+    def _insert(self, value: T, priority: int):
+        if priority < self.last:
+            raise ValueError(f'Priority {priority} is below the last popped priority {self.last}.')
+        bucket = (priority ^ self.last).bit_length()
+        if bucket >= len(self.buckets):
+            self.buckets.extend(dict() for _ in range(bucket + 1 - len(self.buckets)))
+        self.buckets[bucket][value] = None
+        self.priorities[value] = priority
+
+    def push(self, value: T, priority: int = None):
+        if value in self.priorities:
+            raise ValueError(f'Value \'{value}\' already present in heap.')
+        self._insert(value, value if priority is None else priority)
+
+    def _refill(self) -> dict:
+        """
+        Make sure bucket 0 holds the values with the lowest priority, and return it.
+        """
+        buckets = self.buckets
+        if buckets[0]:
+            return buckets[0]
+        if not self.priorities:
+            raise IndexError('Heap is empty')
+        i = 1
+        while not buckets[i]:
+            i += 1
+        bucket, buckets[i] = buckets[i], dict()
+        priorities = self.priorities
+        last = self.last = min(priorities[value] for value in bucket)
+        for value in bucket:
+            buckets[(priorities[value] ^ last).bit_length()][value] = None
+        return buckets[0]
+
+    def pop(self) -> T:
+        value, _ = self._refill().popitem()
+        del self.priorities[value]
+        return value
+
+    def peek(self) -> T:
+        return next(iter(self._refill()))
+
+    def update_value(self, value: T, new_priority: int):
+        old_priority = self.priorities.get(value)
+        if old_priority is None:
+            raise ValueError(f'Value \'{value}\' not found in heap.')
+        # Check before moving the value, so that a failed update leaves it in its bucket
+        if new_priority < self.last:
+            raise ValueError(f'Priority {new_priority} is below the last popped priority {self.last}.')
+        del self.buckets[(old_priority ^ self.last).bit_length()][value]
+        self._insert(value, new_priority)
+
+    def size(self) -> int:
+        return len(self.priorities)
+
+    def is_empty(self) -> bool:
+        return not self.priorities
+
+
+if __name__ == '__main__':
+    heap = RadixHeap[str]()
+    heap.push('A', 30)
+    heap.push('B', 7)
+    heap.push('C', 1_000_000)
+    heap.update_value('C', 12)
+    print('Heap: ', heap)
+    print('Popped: ', [heap.pop() for _ in range(heap.size())])
+    try:
+        heap.push('D', 3)
+    except ValueError as e:
+        print('Caught ValueError: ', e)
+    # Priorities beyond 64 bits get extra buckets
+    heap.push('E', 2 ** 70)
+    heap.push('F', 2 ** 100 + 1)
+    heap.push('G', 2 ** 70 + 1)
+    popped = [heap.pop() for _ in range(heap.size())]
+    assert popped == ['E', 'G', 'F']
+    print('Popped huge priorities: ', popped)
+
+    print()
+
+    # Simulate the access pattern of Dijkstra's algorithm: every push is at or above the last popped priority
+    n = 200_000
+    spread = 1_000_000
+    print(f'Benchmark: {n} monotone pushes and pops with priorities spread over {spread}')
+    operations = [random.randint(0, spread) for _ in range(n)]
+    for heap_type in (RadixHeap, IndexedMinHeap):
+        heap = heap_type()
+        start = time.perf_counter()
+        last = 0
+        for i, offset in enumerate(operations):
+            heap.push(i, last + offset)
+            if i % 2:
+                last = heap.priorities[heap.peek()] if heap_type is RadixHeap else heap.heap[0][1]
+                heap.pop()
+        while not heap.is_empty():
+            heap.pop()
+        print(f'  {heap_type.__name__}: {time.perf_counter() - start:.2f}s')